@@ -46,8 +46,8 @@ router = APIRouter()
 @router.post("/login", response_model=Token)
 async def login(login_data: UserLogin):
     """用户登录，返回 JWT Token"""
-    # 查找用户
-    user = await user_storage.get_user_by_username(login_data.username)
+    # 查找用户（需要 password_hash 校验密码）
+    user = await user_storage.get_user_full(login_data.username)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -39,18 +39,15 @@ async def verify_api_key(req: KeyVerifyRequest, authorization: str = Header(None
         )
         raise HTTPException(status_code=403, detail="Invalid internal auth")
 
-    # 查询 API Key
+    # 查询 API Key（get_api_key 只返回活跃的 Key）
     result = await apikey_storage.get_api_key(req.key)
 
     if not result:
         raise HTTPException(status_code=404, detail="Key not found")
 
-    if not result.get("is_active"):
-        raise HTTPException(status_code=403, detail="Key revoked")
-
     return KeyVerifyResponse(
         key_value=result["key_value"],
         user_id=result["user_id"],
-        is_active=result["is_active"],
+        is_active=True,
         purpose=result.get("purpose", "default"),
     )
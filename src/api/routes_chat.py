@@ -100,19 +100,17 @@ async def list_models(req: Request):
     for provider_name, provider in providers.items():
         try:
             models_data = await provider.list_models()
-            if models_data and "data" in models_data:
-                for model in models_data["data"]:
-                    # 数据清洗：按照 OpenAI 最小可用格式
-                    model_id = model.get("id", "")
-                    if not model_id:
-                        continue
-                    cleaned_model = {
-                        "id": f"{provider_name}/{model_id}",
-                        "object": "model",
-                        "created": model.get("created", 0),
-                        "owned_by": model.get("owned_by", provider_name),
-                    }
-                    all_models.append(cleaned_model)
+            for model in models_data.data:
+                # 数据清洗：按照 OpenAI 最小可用格式
+                if not model.id:
+                    continue
+                cleaned_model = {
+                    "id": f"{provider_name}/{model.id}",
+                    "object": "model",
+                    "created": model.created,
+                    "owned_by": model.owned_by or provider_name,
+                }
+                all_models.append(cleaned_model)
         except Exception as e:
             # 如果某个 provider 获取失败，跳过并继续
             print(f"Failed to get models from {provider_name}: {e}")
@@ -190,7 +188,8 @@ async def chat_completions(req: Request):
 
         async def stream_generator():
             raw_iter = provider.chat_completions_stream(payload)
-            async for line in pipeline.rewrite_sse_lines(ctx, raw_iter):
-                yield line.encode() + "\n\n".encode()
+            # SSE 事件以字节透传，只追加事件分隔的空行
+            async for frame in pipeline.rewrite_sse_lines(ctx, raw_iter):
+                yield frame + b"\n\n"
 
         return StreamingResponse(stream_generator(), media_type="text/event-stream")
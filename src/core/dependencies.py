@@ -7,7 +7,7 @@ from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from src.core.security import decode_access_token
-from src.storage import session_storage, user_storage
+from src.storage import auth_prefetch, session_storage, user_storage
 
 # 请求签名有效期（秒）
 SIGNATURE_EXPIRY_SECONDS = 60
@@ -167,15 +167,19 @@ async def verify_request_signature(
     except ValueError:
         raise signature_exception
 
-    # 2. 验证 nonce 是否已使用（防重放）
-    if not await session_storage.is_nonce_valid(nonce):
+    # 2. 一次查询预取 nonce 使用状态和用户的 session_secret
+    nonce_used, session_secret = await auth_prefetch.prefetch_signature(
+        current_user["id"], nonce
+    )
+
+    # 验证 nonce 是否已使用（防重放）
+    if nonce_used:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Request nonce already used",
         )
 
-    # 3. 获取用户的 session_secret
-    session_secret = await session_storage.get_session_secret(current_user["id"])
+    # 3. 验证用户的 session_secret
     if not session_secret:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -20,7 +20,8 @@ from src.core.logging import (
 )
 from src.core.settings import get_settings
 from src.providers import DeepSeekProvider, MoonshotProvider, TestProvider, ZaiProvider
-from src.storage import apikey_storage, session_storage, user_storage
+from src.storage import apikey_storage, auth_prefetch, session_storage, user_storage
+from src.storage.maintenance import wal_maintenance
 
 # uvloop 在 Windows 上不可用，只在非 Windows 平台使用
 if platform.system() != "Windows":
@@ -42,7 +43,19 @@ async def lifespan(app: FastAPI):
     reconfigure_uvicorn_logging(log_access=settings.log_access)
     reconfigure_hypercorn_logging(log_access=settings.log_access)
 
+    # 后台定期截断 WAL 文件
+    wal_task = asyncio.create_task(wal_maintenance())
+
     yield
+    wal_task.cancel()
+    # 关闭数据库执行线程
+    user_storage.close()
+    apikey_storage.close()
+    session_storage.close()
+    auth_prefetch.close()
+    # 关闭各 Provider 的 HTTP 连接池
+    for provider in app.state.providers.values():
+        await provider.aclose()
     # 关闭时停止日志监听器
     stop_logging()
 
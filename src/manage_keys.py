@@ -3,6 +3,8 @@ import asyncio
 import sys
 from pathlib import Path
 
+import orjson
+
 sys.path.append(str(Path(__file__).parent.parent))
 
 from src.core.security import generate_secure_key
@@ -65,6 +67,13 @@ async def list_keys(args):
     user_id = user["id"]
     keys = await apikey_storage.list_api_keys_by_user(user_id)
 
+    if args.json:
+        # 结构化输出，供脚本/测试解析（Key 同样脱敏）
+        for key in keys:
+            key["key_value"] = mask_key(key["key_value"])
+        print(orjson.dumps(keys).decode())
+        return
+
     if not keys:
         print(f"ℹ️ 用户 '{args.username}' 没有 API Key。")
         return
@@ -139,7 +148,7 @@ async def revoke_key(args):
         print("[ERROR] 吊销失败：可能 Key 不存在或无权操作。")
 
 
-async def main():
+async def main(argv=None):
     parser = argparse.ArgumentParser(
         description="API Key 管理工具",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -171,6 +180,7 @@ async def main():
     # 列出 Key 子命令
     list_parser = subparsers.add_parser("list", help="列出用户的所有 API Key")
     list_parser.add_argument("--username", required=True, help="用户名")
+    list_parser.add_argument("--json", action="store_true", help="以 JSON 数组输出")
     list_parser.set_defaults(func=list_keys)
 
     # 吊销 Key 子命令
@@ -184,7 +194,7 @@ async def main():
     )
     revoke_parser.set_defaults(func=revoke_key)
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if not args.command:
         parser.print_help()
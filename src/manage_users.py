@@ -5,6 +5,8 @@ from pathlib import Path
 import re
 import sys
 
+import orjson
+
 from src.core.security import hash_password, sha256_hash
 from src.storage import user_storage
 
@@ -135,6 +137,11 @@ async def list_users(args):
 
     users = await user_storage.list_users()
 
+    if args.json:
+        # 结构化输出，供脚本/测试解析
+        print(orjson.dumps(users).decode())
+        return
+
     if not users:
         print("ℹ️  系统中没有用户。")
         return
@@ -283,7 +290,7 @@ async def demote_user(args):
         print("[ERROR] 取消失败：数据库错误。")
 
 
-async def main():
+async def main(argv=None):
     parser = argparse.ArgumentParser(
         description="用户管理工具 - 用于创建和管理超级用户",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -314,6 +321,7 @@ async def main():
 
     # 列出用户
     list_parser = subparsers.add_parser("list-users", help="列出所有用户")
+    list_parser.add_argument("--json", action="store_true", help="以 JSON 数组输出")
     list_parser.set_defaults(func=list_users)
 
     # 吊销用户
@@ -354,7 +362,7 @@ async def main():
     )
     demote_parser.set_defaults(func=demote_user)
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if not args.command:
         parser.print_help()
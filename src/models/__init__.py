@@ -1,4 +1,5 @@
 from src.models.auth import Token, TokenPayload, UserLogin, UserRegister
+from src.models.provider import ModelInfo, ModelsResponse, decode_models
 from src.models.usage import (
     UsageLogEntry,
     UsageSettlementRequest,
@@ -27,4 +28,7 @@ __all__ = [
     "UsageLogEntry",
     "UsageSettlementRequest",
     "UsageSettlementResponse",
+    "ModelInfo",
+    "ModelsResponse",
+    "decode_models",
 ]
@@ -0,0 +1,35 @@
+"""
+Provider 响应数据模型
+
+使用 msgspec.Struct 解码上游响应，JSON 解析与类型校验一次完成
+"""
+
+from typing import Optional, Union
+
+import msgspec
+
+
+class ModelInfo(msgspec.Struct):
+    """单个模型信息（OpenAI /models 格式，忽略未声明的字段）"""
+
+    id: str
+    object: str = "model"
+    # 部分上游以浮点数或数字字符串返回时间戳，宽松解码后原样透传
+    created: Optional[Union[int, float]] = 0
+    owned_by: Optional[str] = None
+
+
+class ModelsResponse(msgspec.Struct):
+    """模型列表响应"""
+
+    object: str = "list"
+    data: list[ModelInfo] = []
+
+
+# strict=False：允许数字字符串等可无损转换的类型，避免单个字段导致整个模型列表解码失败
+_models_decoder = msgspec.json.Decoder(ModelsResponse, strict=False)
+
+
+def decode_models(content: bytes) -> ModelsResponse:
+    """解码并校验 /models 响应体（格式不符时抛出 msgspec.ValidationError）"""
+    return _models_decoder.decode(content)
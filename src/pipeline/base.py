@@ -1,7 +1,8 @@
-import json
 import logging
 from typing import Any, AsyncIterator, Dict
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,8 +28,8 @@ class BasePipeline:
         return raw
 
     async def rewrite_sse_lines(
-        self, ctx: Dict[str, Any], raw_lines: AsyncIterator[str]
-    ) -> AsyncIterator[str]:
+        self, ctx: Dict[str, Any], raw_lines: AsyncIterator[bytes]
+    ) -> AsyncIterator[bytes]:
         async for line in raw_lines:
             if logger.isEnabledFor(logging.DEBUG):
                 logger.debug(
@@ -41,12 +42,12 @@ class SSEDecoder:
     def __init__(self):
         self.buffer = ""
 
-    def decode(self, line: str) -> Dict[str, Any]:
+    def decode(self, line: bytes) -> Dict[str, Any]:
         line = line.strip()
-        if not line or not line.startswith("data: "):
+        if not line or not line.startswith(b"data: "):
             return None
-        data_content = line[len("data: ") :]
-        if data_content == "[DONE]":
+        data_content = line[len(b"data: ") :]
+        if data_content == b"[DONE]":
             return None
-        data = json.loads(data_content)
+        data = orjson.loads(data_content)
         return data
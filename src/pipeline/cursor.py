@@ -5,6 +5,8 @@ from copy import copy, deepcopy
 from pathlib import Path
 from typing import Any, AsyncIterator, Dict, List
 
+import orjson
+
 from .base import BasePipeline, SSEDecoder
 
 logger = logging.getLogger(__name__)
@@ -191,8 +193,8 @@ class CursorPipeline(BasePipeline):
         asyncio.create_task(self._async_save_chat_history(chat_id, chat_history))
 
     async def rewrite_sse_lines(
-        self, ctx: Dict[str, Any], raw_lines: AsyncIterator[str]
-    ) -> AsyncIterator[str]:
+        self, ctx: Dict[str, Any], raw_lines: AsyncIterator[bytes]
+    ) -> AsyncIterator[bytes]:
         self.reasoning_flag = False
         chat_id = ctx.get("chat_id")
         chat_history = ctx.get("chat_history", [])
@@ -213,7 +215,7 @@ class CursorPipeline(BasePipeline):
                 self._update_usage(usage, data)
                 rewrite_data = self._rewrite_sse_data(ctx, data)
                 for new_data in rewrite_data:
-                    new_line = f"data: {json.dumps(new_data, ensure_ascii=False)}"
+                    new_line = b"data: " + orjson.dumps(new_data)
                     if logger.isEnabledFor(logging.DEBUG):
                         logger.debug(
                             "ChatID: %s | Rewritten Line: %s", chat_id, new_line
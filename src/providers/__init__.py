@@ -1,12 +1,13 @@
 from .base import BaseProvider
 from .deepseek import DeepSeekProvider
-from .moonshot import MoonshotProvider
+from .moonshot import KimiProvider, MoonshotProvider
 from .test_provider import TestProvider
 from .zai import ZaiProvider
 
 __all__ = [
     "BaseProvider",
     "MoonshotProvider",
+    "KimiProvider",
     "DeepSeekProvider",
     "ZaiProvider",
     "TestProvider",
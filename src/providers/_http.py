@@ -0,0 +1,46 @@
+"""Provider 使用的 HTTP 客户端
+
+每个 Provider 实例持有一个长期存在的 httpx.AsyncClient（HTTP/2 + keep-alive 连接池），
+并发请求在少量 TCP/TLS 连接上多路复用，避免每次请求重新握手。
+"""
+
+from typing import AsyncIterator
+
+import httpx
+
+from src.utils.sse import SSEFrameSplitter
+
+# 连接池上限
+CLIENT_LIMITS = httpx.Limits(
+    max_keepalive_connections=32, max_connections=200, keepalive_expiry=60
+)
+# 默认超时（非流式请求）
+CLIENT_TIMEOUT = httpx.Timeout(connect=5, read=120, write=30, pool=5)
+# 流式请求不限制读超时（推理模型的两个 chunk 之间可能间隔很久）
+STREAM_TIMEOUT = httpx.Timeout(connect=5, read=None, write=30, pool=5)
+
+
+def create_client(base_url: str, headers: dict) -> httpx.AsyncClient:
+    """创建 Provider 专用的 HTTP/2 客户端"""
+    return httpx.AsyncClient(
+        base_url=base_url,
+        http2=True,
+        headers=headers,
+        limits=CLIENT_LIMITS,
+        timeout=CLIENT_TIMEOUT,
+    )
+
+
+async def iter_sse_frames(response: httpx.Response) -> AsyncIterator[bytes]:
+    """按 SSE 事件（以空行分隔）切分响应字节流
+
+    直接在字节上切分（见 SSEFrameSplitter），跳过 aiter_lines 的逐行解码与缓冲；
+    事件以原始字节返回，透传给客户端时无需 decode/encode。
+    """
+    splitter = SSEFrameSplitter()
+    async for chunk in response.aiter_bytes():
+        for frame in splitter.feed(chunk):
+            yield frame
+    # 流结束时残留的最后一个事件（上游未以空行结尾）
+    if (frame := splitter.flush()) is not None:
+        yield frame
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import Any, AsyncIterator, Dict
 
+from src.models.provider import ModelsResponse
+
 
 class BaseProvider(ABC):
     @abstractmethod
@@ -9,14 +11,16 @@ class BaseProvider(ABC):
     @abstractmethod
     async def chat_completions_stream(
         self, payload: Dict[str, Any]
-    ) -> AsyncIterator[str]: ...
+    ) -> AsyncIterator[bytes]:
+        """流式聊天，逐个返回 SSE 事件的原始字节（不含结尾的空行）"""
+        ...
 
     @abstractmethod
-    async def list_models(self) -> Dict[str, Any]:
+    async def list_models(self) -> ModelsResponse:
         """获取模型列表
 
         Returns:
-            Dict containing model list with format:
+            ModelsResponse（msgspec.Struct），对应的 JSON 格式:
             {
                 "object": "list",
                 "data": [
@@ -30,3 +34,7 @@ class BaseProvider(ABC):
             }
         """
         ...
+
+    async def aclose(self):
+        """释放 Provider 持有的资源（如 HTTP 连接池），应用关闭时调用"""
+        return None
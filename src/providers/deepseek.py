@@ -1,53 +1,94 @@
 import logging
-from copy import copy, deepcopy
-from typing import Any, AsyncIterator, Dict
+import sys
+from copy import copy
+from typing import Any, AsyncIterator, Dict, Optional
 
 import httpx
+import orjson
 
+from src.models.provider import ModelsResponse, decode_models
+
+from ._http import STREAM_TIMEOUT, create_client, iter_sse_frames
 from .base import BaseProvider
 
 logger = logging.getLogger(__name__)
 
 
+# 占位文本的固定前后缀（驻留字符串，渲染时只做一次 join）
+_IMG_PREFIX = sys.intern("\n[Attached Image: ")
+_UNSUP_PREFIX = sys.intern("\n[Unsupported Multimodal Block: ")
+_UNK_PREFIX = sys.intern("\n[Unknown Content Block: ")
+_CLOSE = sys.intern("]\n")
+
+
+def _render_text(item: dict) -> str:
+    return item.get("text", "")
+
+
+def _render_image_url(item: dict) -> str:
+    url = item.get("image_url", {}).get("url", "")
+    return "".join((_IMG_PREFIX, url, _CLOSE))
+
+
+def _render_unsupported(item: dict) -> str:
+    return "".join((_UNSUP_PREFIX, str(item.get("type")), _CLOSE))
+
+
+# 按块类型分发的渲染函数（未知类型走 _render_unsupported）
+_HANDLERS = {
+    "text": _render_text,
+    "image_url": _render_image_url,
+}
+
+
+def _render_block(item: Any) -> str:
+    """把单个多模态内容块渲染为纯文本"""
+    if isinstance(item, str):
+        return item
+    if not isinstance(item, dict):
+        return "".join((_UNK_PREFIX, str(item), _CLOSE))
+    return _HANDLERS.get(item.get("type"), _render_unsupported)(item)
+
+
 def merge_tool_content(msg: dict) -> dict:
     content = msg.get("content")
 
     if content is None or isinstance(content, str):
         return msg
-    new_msg = deepcopy(msg)
-    text_parts = []
-    for item in content:
-        if isinstance(item, str):
-            text_parts.append(item)
-            continue
-        if not isinstance(item, dict):
-            text_parts.append(f"\n[Unknown Content Block: {item}]\n")
-            continue
-        block_type = item.get("type")
-        if block_type == "text":
-            text_parts.append(item.get("text", ""))
-        elif block_type == "image_url":
-            url = item.get("image_url", {}).get("url", "")
-            text_parts.append(f"\n[Attached Image: {url}]\n")
-        else:
-            text_parts.append(f"\n[Unsupported Multimodal Block: {block_type}]\n")
-    new_msg["content"] = "".join(text_parts)
+    # 只替换 content，浅拷贝即可保证不修改原消息
+    new_msg = dict(msg)
+    if len(content) == 1:
+        # 单个内容块（最常见的情况）直接渲染，省去列表与 join
+        new_msg["content"] = _render_block(content[0])
+    else:
+        new_msg["content"] = "".join([_render_block(item) for item in content])
     return new_msg
 
 
 class DeepSeekProvider(BaseProvider):
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
-
-    def _headers(self):
-        return {
-            "Authorization": f"Bearer {self.api_key}",
+        # api_key 在实例生命周期内不变，请求头只构建一次
+        self._cached_headers = {
+            "Authorization": f"Bearer {api_key}",
             "Accept": "application/json",
             "Accept-Encoding": "gzip, br",
         }
+        self._client = client or create_client(self.base_url, self._cached_headers)
+
+    def _headers(self):
+        return self._cached_headers
 
     def preprocess_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        # 绝大多数请求没有 tool 消息，直接返回浅拷贝
+        if not any(m.get("role") == "tool" for m in payload.get("messages", ())):
+            return copy(payload)
         new_payload = copy(payload)
         msg_list = new_payload.get("messages", [])
         new_msg_list = copy(msg_list)
@@ -62,40 +103,32 @@ class DeepSeekProvider(BaseProvider):
 
     async def chat_completions(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         new_payload = self.preprocess_payload(payload)
-        async with httpx.AsyncClient(timeout=120) as client:
-            r = await client.post(
-                f"{self.base_url}/chat/completions",
-                json=new_payload,
-                headers=self._headers(),
-            )
-            r.raise_for_status()
-            return r.json()
+        r = await self._client.post("/chat/completions", json=new_payload)
+        r.raise_for_status()
+        return orjson.loads(r.content)
 
     async def chat_completions_stream(
         self, payload: Dict[str, Any]
-    ) -> AsyncIterator[str]:
+    ) -> AsyncIterator[bytes]:
         new_payload = self.preprocess_payload(payload)
-        async with httpx.AsyncClient(timeout=None) as client:
-            async with client.stream(
-                "POST",
-                f"{self.base_url}/chat/completions",
-                json=new_payload,
-                headers=self._headers(),
-            ) as r:
-                if r.status_code != 200:
-                    text = await r.aread()
-                    text = text.decode()
-                    logger.error(f"Kimi API Error: {r.status_code} {text}")
-                    # save_request("error_request", payload)
-                    r.raise_for_status()
-                async for line in r.aiter_lines():
-                    if len(line) == 0:
-                        continue
-                    yield line
-
-    async def list_models(self) -> Dict[str, Any]:
+        async with self._client.stream(
+            "POST", "/chat/completions", json=new_payload, timeout=STREAM_TIMEOUT
+        ) as r:
+            if r.status_code != 200:
+                text = await r.aread()
+                text = text.decode()
+                logger.error(f"Kimi API Error: {r.status_code} {text}")
+                # save_request("error_request", payload)
+                r.raise_for_status()
+            async for frame in iter_sse_frames(r):
+                yield frame
+
+    async def list_models(self) -> ModelsResponse:
         """获取 DeepSeek 模型列表"""
-        async with httpx.AsyncClient(timeout=30) as client:
-            r = await client.get(f"{self.base_url}/models", headers=self._headers())
-            r.raise_for_status()
-            return r.json()
+        r = await self._client.get("/models", timeout=30)
+        r.raise_for_status()
+        return decode_models(r.content)
+
+    async def aclose(self):
+        """关闭连接池"""
+        await self._client.aclose()
@@ -8,6 +8,8 @@ import json
 import time
 from typing import Any, AsyncIterator, Dict, Optional
 
+from src.models.provider import ModelInfo, ModelsResponse
+
 from .base import BaseProvider
 
 
@@ -99,7 +101,7 @@ class TestProvider(BaseProvider):
 
     async def chat_completions_stream(
         self, payload: Dict[str, Any]
-    ) -> AsyncIterator[str]:
+    ) -> AsyncIterator[bytes]:
         """模拟流式聊天完成"""
         model = payload.get("model", "test-model")
         messages = payload.get("messages", [])
@@ -142,34 +144,18 @@ class TestProvider(BaseProvider):
                     }
                 ],
             }
-            yield f"data: {json.dumps(data)}"
+            yield b"data: " + json.dumps(data).encode()
 
-        yield "data: [DONE]"
+        yield b"data: [DONE]"
 
-    async def list_models(self) -> Dict[str, Any]:
+    async def list_models(self) -> ModelsResponse:
         """返回测试模型列表"""
         # await asyncio.sleep(10 / 1000)  # 10ms 延迟
 
-        return {
-            "object": "list",
-            "data": [
-                {
-                    "id": "test-fast",
-                    "object": "model",
-                    "created": int(time.time()),
-                    "owned_by": "test-provider",
-                },
-                {
-                    "id": "test-slow",
-                    "object": "model",
-                    "created": int(time.time()),
-                    "owned_by": "test-provider",
-                },
-                {
-                    "id": "test-stream",
-                    "object": "model",
-                    "created": int(time.time()),
-                    "owned_by": "test-provider",
-                },
-            ],
-        }
+        created = int(time.time())
+        return ModelsResponse(
+            data=[
+                ModelInfo(id=model_id, created=created, owned_by="test-provider")
+                for model_id in ("test-fast", "test-slow", "test-stream")
+            ]
+        )
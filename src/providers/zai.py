@@ -1,58 +1,62 @@
 import logging
-from typing import Any, AsyncIterator, Dict
+from typing import Any, AsyncIterator, Dict, Optional
 
 import httpx
+import orjson
 
+from src.models.provider import ModelsResponse, decode_models
+
+from ._http import STREAM_TIMEOUT, create_client, iter_sse_frames
 from .base import BaseProvider
 
 logger = logging.getLogger(__name__)
 
 
 class ZaiProvider(BaseProvider):
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
-
-    def _headers(self):
-        return {
-            "Authorization": f"Bearer {self.api_key}",
+        # api_key 在实例生命周期内不变，请求头只构建一次
+        self._cached_headers = {
+            "Authorization": f"Bearer {api_key}",
             "Accept": "application/json",
             "Accept-Encoding": "gzip, br",
         }
+        self._client = client or create_client(self.base_url, self._cached_headers)
+
+    def _headers(self):
+        return self._cached_headers
 
     async def chat_completions(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        async with httpx.AsyncClient(timeout=120) as client:
-            r = await client.post(
-                f"{self.base_url}/chat/completions",
-                json=payload,
-                headers=self._headers(),
-            )
-            r.raise_for_status()
-            return r.json()
+        r = await self._client.post("/chat/completions", json=payload)
+        r.raise_for_status()
+        return orjson.loads(r.content)
 
     async def chat_completions_stream(
         self, payload: Dict[str, Any]
-    ) -> AsyncIterator[str]:
-        async with httpx.AsyncClient(timeout=None) as client:
-            async with client.stream(
-                "POST",
-                f"{self.base_url}/chat/completions",
-                json=payload,
-                headers=self._headers(),
-            ) as r:
-                if r.status_code != 200:
-                    text = await r.aread()
-                    text = text.decode()
-                    logger.error(f"Zai API Error: {r.status_code} {text}")
-                    r.raise_for_status()
-                async for line in r.aiter_lines():
-                    if len(line) == 0:
-                        continue
-                    yield line
-
-    async def list_models(self) -> Dict[str, Any]:
+    ) -> AsyncIterator[bytes]:
+        async with self._client.stream(
+            "POST", "/chat/completions", json=payload, timeout=STREAM_TIMEOUT
+        ) as r:
+            if r.status_code != 200:
+                text = await r.aread()
+                text = text.decode()
+                logger.error(f"Zai API Error: {r.status_code} {text}")
+                r.raise_for_status()
+            async for frame in iter_sse_frames(r):
+                yield frame
+
+    async def list_models(self) -> ModelsResponse:
         """获取 Zai 模型列表"""
-        async with httpx.AsyncClient(timeout=30) as client:
-            r = await client.get(f"{self.base_url}/models", headers=self._headers())
-            r.raise_for_status()
-            return r.json()
+        r = await self._client.get("/models", timeout=30)
+        r.raise_for_status()
+        return decode_models(r.content)
+
+    async def aclose(self):
+        """关闭连接池"""
+        await self._client.aclose()
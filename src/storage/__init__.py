@@ -1,5 +1,6 @@
 from .apikey_storage import storage as apikey_storage
+from .auth_prefetch import auth_prefetch
 from .session_storage import session_storage
 from .user_storage import storage as user_storage
 
-__all__ = ["apikey_storage", "session_storage", "user_storage"]
+__all__ = ["apikey_storage", "auth_prefetch", "session_storage", "user_storage"]
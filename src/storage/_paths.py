@@ -0,0 +1,7 @@
+import os
+from pathlib import Path
+
+# 所有 SQLite 数据库文件的存放目录（模块导入时创建一次）
+# 可通过环境变量 LLM_ROUTER_DB_DIR 覆盖（如集成测试使用临时目录）
+DB_DIR = Path(os.environ.get("LLM_ROUTER_DB_DIR", "./data"))
+DB_DIR.mkdir(parents=True, exist_ok=True)
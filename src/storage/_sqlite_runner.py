@@ -0,0 +1,155 @@
+"""SQLite 专用线程执行器
+
+每个数据库文件对应一个 SQLiteRunner：一条后台守护线程持有同步的
+sqlite3 连接，从 SimpleQueue 中依次取出请求执行，再通过
+``loop.call_soon_threadsafe`` 把结果交回调用方的事件循环。
+相比 aiosqlite 的“每次调用一次队列握手”，同一连接上的请求无需重复建连，
+且每次查询只经历一次线程往返。
+"""
+
+import asyncio
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# 建立连接时执行一次的 PRAGMA（对连接生命周期内的所有请求生效）
+STARTUP_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",  # 256 MiB 内存映射读
+    "PRAGMA cache_size=-64000",  # 64 MiB 页缓存
+    "PRAGMA temp_store=memory",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA wal_autocheckpoint=200",  # 200 页自动 checkpoint，限制 WAL 增长
+)
+
+# 队列中的关闭信号
+_STOP = object()
+
+
+def _set_result(future: asyncio.Future, result: Any):
+    if not future.cancelled():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, exc: BaseException):
+    if not future.cancelled():
+        future.set_exception(exc)
+
+
+def _deliver(loop: asyncio.AbstractEventLoop, callback, future, value):
+    """把结果投递回调用方事件循环（循环已关闭时直接丢弃）"""
+    try:
+        loop.call_soon_threadsafe(callback, future, value)
+    except RuntimeError:
+        pass
+
+
+class SQLiteRunner:
+    """在单个专用线程上串行执行同步 sqlite3 操作"""
+
+    def __init__(self, db_path: Path, attach: Optional[Dict[str, Path]] = None):
+        """
+        Args:
+            db_path: 主数据库文件路径
+            attach: 额外挂载的数据库 {schema 别名: 文件路径}，建立连接时 ATTACH
+        """
+        self.db_path = db_path
+        self.attach = attach or {}
+        self._queue: Optional[queue.SimpleQueue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """创建连接并应用启动 PRAGMA"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in STARTUP_PRAGMAS:
+            conn.execute(pragma)
+        for alias, path in self.attach.items():
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", (str(path),))
+        return conn
+
+    def _worker(self, requests: queue.SimpleQueue):
+        """后台线程主循环：逐个执行队列中的请求"""
+        conn: Optional[sqlite3.Connection] = None
+        while True:
+            item = requests.get()
+            if item is _STOP:
+                break
+            fn, loop, future = item
+            try:
+                if conn is None:
+                    conn = self._connect()
+                result = fn(conn)
+            except BaseException as e:
+                # 失败时回滚未提交的事务，避免污染后续请求
+                if conn is not None and conn.in_transaction:
+                    conn.rollback()
+                _deliver(loop, _set_exception, future, e)
+            else:
+                _deliver(loop, _set_result, future, result)
+        if conn is not None:
+            conn.close()
+
+    def _ensure_started(self) -> queue.SimpleQueue:
+        """返回请求队列，首次调用时启动后台线程（调用方需持有 _start_lock）"""
+        if self._queue is None:
+            requests = queue.SimpleQueue()
+            thread = threading.Thread(
+                target=self._worker,
+                args=(requests,),
+                name=f"sqlite-{self.db_path.stem}",
+                daemon=True,
+            )
+            thread.start()
+            self._thread, self._queue = thread, requests
+        return self._queue
+
+    async def run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """在专用线程上执行 fn(conn) 并等待结果
+
+        Args:
+            fn: 接收 sqlite3.Connection 的同步函数，写操作需自行 commit
+
+        Returns:
+            fn 的返回值（异常会原样抛出）
+
+        Raises:
+            RuntimeError: 执行器已关闭
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # 入队与 close() 互斥：关闭信号之后不会再有请求入队，避免调用方永久等待
+        with self._start_lock:
+            if self._closed:
+                raise RuntimeError(f"SQLiteRunner 已关闭: {self.db_path}")
+            self._ensure_started().put((fn, loop, future))
+        return await future
+
+    async def wal_checkpoint(self) -> tuple:
+        """执行 WAL checkpoint 并截断 WAL 文件
+
+        Returns:
+            (busy, log_pages, checkpointed_pages)
+        """
+        row = await self.run(
+            lambda conn: conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        )
+        return tuple(row)
+
+    def close(self, timeout: float = 5.0):
+        """停止后台线程并关闭连接（已入队的请求仍会执行完毕，之后的 run() 抛出 RuntimeError）"""
+        with self._start_lock:
+            self._closed = True
+            thread, requests = self._thread, self._queue
+            self._thread, self._queue = None, None
+            if thread is None:
+                return
+            requests.put(_STOP)
+        thread.join(timeout=timeout)
@@ -1,23 +1,24 @@
 import asyncio
+import sqlite3
 import time
-from pathlib import Path
 from typing import Dict, Optional
 
-import aiosqlite
+from ._paths import DB_DIR
+from ._sqlite_runner import SQLiteRunner
 
 # API Key 独立数据库（与用户库分离，通过 user_id 逻辑关联）
-DB_DIR = Path("./data")
 DB_PATH = DB_DIR / "api_keys.db"
 
 # 内存缓存配置
 CACHE_TTL_SECONDS = 60  # 缓存 60 秒
 
+# 列表接口返回的字段
+KEY_LIST_COLUMNS = ("id", "key_value", "user_id", "is_active", "created_at", "purpose")
+
 
 class APIKeyStorage:
     def __init__(self):
-        # 确保目录存在
-        if not DB_DIR.exists():
-            DB_DIR.mkdir(parents=True, exist_ok=True)
+        self._runner = SQLiteRunner(DB_PATH)
         # 内存缓存: {key_value: (result, expires_at)}
         self._cache: Dict[str, tuple] = {}
         self._cache_lock = asyncio.Lock()
@@ -37,6 +38,12 @@ class APIKeyStorage:
         expires_at = time.time() + CACHE_TTL_SECONDS
         self._cache[key_value] = (result, expires_at)
 
+    def _invalidate_cache(self, key_id: int):
+        """Key 被吊销/删除后清除对应的缓存项"""
+        for key_value, (result, _) in list(self._cache.items()):
+            if result is not None and result["id"] == key_id:
+                del self._cache[key_value]
+
     async def get_api_key(self, key_value: str) -> Optional[dict]:
         """查询特定的 API Key 是否存在且活跃（带内存缓存）"""
         # 先检查内存缓存
@@ -45,27 +52,25 @@ class APIKeyStorage:
             return cached
 
         # 缓存未命中，查询数据库
-        async with aiosqlite.connect(DB_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                "SELECT * FROM api_keys WHERE key_value = ? AND is_active = 1",
+        row = await self._runner.run(
+            lambda conn: conn.execute(
+                """SELECT id, key_value, user_id, purpose FROM api_keys
+                   WHERE key_value = ? AND is_active = 1""",
                 (key_value,),
-            ) as cursor:
-                row = await cursor.fetchone()
-                result = dict(row) if row else None
+            ).fetchone()
+        )
+        result = dict(row) if row else None
 
         # 写入缓存（包括未找到的情况也缓存，防止缓存穿透）
         self._set_cache(key_value, result)
         return result
 
     async def init_db(self):
-        """初始化数据库表并开启 WAL 模式"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            # 开启 WAL 模式以支持多进程高并发
-            await db.execute("PRAGMA journal_mode=WAL;")
+        """初始化数据库表（WAL 等 PRAGMA 由执行器在建立连接时开启）"""
 
+        def _init(conn: sqlite3.Connection):
             # 创建 API Key 表（无外部约束，通过 user_id 逻辑关联用户）
-            await db.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS api_keys (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     key_value TEXT UNIQUE NOT NULL,
@@ -75,109 +80,181 @@ class APIKeyStorage:
                     purpose TEXT
                 )
             """)
-            await db.commit()
+
+            # 创建索引：鉴权热路径只查活跃 Key（部分索引跳过已吊销的行）
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_api_keys_lookup
+                ON api_keys(key_value) WHERE is_active = 1
+            """)
+            # 按用户列出 Key 并按创建时间倒序，避免全表扫描 + 排序
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_api_keys_user_created
+                ON api_keys(user_id, created_at DESC)
+            """)
+            conn.commit()
+
+        await self._runner.run(_init)
 
     async def add_api_key(
         self, key_value: str, user_id: int, purpose: str = "default"
     ) -> bool:
         """插入新的 API Key"""
+
+        def _insert(conn: sqlite3.Connection):
+            conn.execute(
+                "INSERT INTO api_keys (key_value, user_id, purpose) VALUES (?, ?, ?)",
+                (key_value, user_id, purpose),
+            )
+            conn.commit()
+
         try:
-            async with aiosqlite.connect(DB_PATH) as db:
-                await db.execute(
-                    "INSERT INTO api_keys (key_value, user_id, purpose) VALUES (?, ?, ?)",
-                    (key_value, user_id, purpose),
-                )
-                await db.commit()
-                return True
-        except aiosqlite.IntegrityError:
+            await self._runner.run(_insert)
+            return True
+        except sqlite3.IntegrityError:
             # 如果 Key 已存在（唯一性约束）
             return False
 
-    async def get_api_key(self, key_value: str) -> Optional[dict]:
-        """查询特定的 API Key 是否存在且活跃"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                "SELECT * FROM api_keys WHERE key_value = ? AND is_active = 1",
-                (key_value,),
-            ) as cursor:
-                row = await cursor.fetchone()
-                return dict(row) if row else None
+    async def add_api_keys(self, items: list[tuple[str, int, str]]) -> int:
+        """批量插入 API Key（同一事务内完成，只提交一次）
+
+        Args:
+            items: [(key_value, user_id, purpose), ...]
+
+        Returns:
+            插入的数量（任一 Key 已存在时整批回滚，返回 0）
+        """
+
+        def _insert_many(conn: sqlite3.Connection):
+            conn.executemany(
+                "INSERT INTO api_keys (key_value, user_id, purpose) VALUES (?, ?, ?)",
+                items,
+            )
+            conn.commit()
+
+        if not items:
+            return 0
+        try:
+            await self._runner.run(_insert_many)
+            return len(items)
+        except sqlite3.IntegrityError:
+            return 0
 
     async def list_api_keys_by_user(self, user_id: int) -> list[dict]:
         """列出指定用户的所有 API Key（包括已吊销的）"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
+        rows = await self._runner.run(
+            lambda conn: conn.execute(
                 """SELECT id, key_value, user_id, is_active, created_at, purpose
                    FROM api_keys
                    WHERE user_id = ?
                    ORDER BY created_at DESC""",
                 (user_id,),
-            ) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+            ).fetchall()
+        )
+        return [dict(row) for row in rows]
 
     async def list_all_keys(self) -> list[dict]:
         """列出所有 API Key（超级用户用）"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
+        rows = await self._runner.run(
+            lambda conn: conn.execute(
                 """SELECT id, key_value, user_id, is_active, created_at, purpose
                    FROM api_keys
                    ORDER BY created_at DESC"""
-            ) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+            ).fetchall()
+        )
+        return [dict(row) for row in rows]
+
+    async def list_all_keys_columns(self) -> dict[str, list]:
+        """列出所有 API Key（列式返回，供批量管理/序列化使用）
+
+        Returns:
+            {"id": [...], "key_value": [...], "user_id": [...],
+            "is_active": [...], "created_at": [...], "purpose": [...]}
+        """
+
+        def _fetch(conn: sqlite3.Connection) -> list[tuple]:
+            # 直接取元组，跳过 sqlite3.Row 的构造
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            return cursor.execute(f"""SELECT {", ".join(KEY_LIST_COLUMNS)}
+                   FROM api_keys
+                   ORDER BY created_at DESC""").fetchall()
+
+        rows = await self._runner.run(_fetch)
+        columns = zip(*rows) if rows else ([] for _ in KEY_LIST_COLUMNS)
+        return {name: list(values) for name, values in zip(KEY_LIST_COLUMNS, columns)}
 
     async def revoke_api_key(self, key_id: int, user_id: int) -> bool:
         """吊销指定 ID 的 API Key（只能吊销属于自己的 Key）"""
-        async with aiosqlite.connect(DB_PATH) as db:
+
+        def _revoke(conn: sqlite3.Connection) -> bool:
             # 验证该 Key 是否属于指定用户
-            async with db.execute(
+            row = conn.execute(
                 "SELECT user_id FROM api_keys WHERE id = ?", (key_id,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                if not row:
-                    return False  # Key 不存在
-                if row[0] != user_id:
-                    return False  # 无权操作他人的 Key
+            ).fetchone()
+            if not row:
+                return False  # Key 不存在
+            if row[0] != user_id:
+                return False  # 无权操作他人的 Key
 
             # 执行吊销操作
-            cursor = await db.execute(
+            cursor = conn.execute(
                 "UPDATE api_keys SET is_active = 0 WHERE id = ? AND user_id = ?",
                 (key_id, user_id),
             )
-            await db.commit()
+            conn.commit()
             return cursor.rowcount > 0
 
+        revoked = await self._runner.run(_revoke)
+        if revoked:
+            self._invalidate_cache(key_id)
+        return revoked
+
     async def revoke_any_key(self, key_id: int) -> bool:
         """吊销任意 API Key（超级用户用）"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            cursor = await db.execute(
+
+        def _revoke(conn: sqlite3.Connection) -> bool:
+            cursor = conn.execute(
                 "UPDATE api_keys SET is_active = 0 WHERE id = ?", (key_id,)
             )
-            await db.commit()
+            conn.commit()
             return cursor.rowcount > 0
 
+        revoked = await self._runner.run(_revoke)
+        if revoked:
+            self._invalidate_cache(key_id)
+        return revoked
+
     async def delete_api_key(self, key_id: int, user_id: int) -> bool:
         """永久删除指定 ID 的 API Key（只能删除属于自己的 Key）"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            cursor = await db.execute(
+
+        def _delete(conn: sqlite3.Connection) -> bool:
+            cursor = conn.execute(
                 "DELETE FROM api_keys WHERE id = ? AND user_id = ?", (key_id, user_id)
             )
-            await db.commit()
+            conn.commit()
             return cursor.rowcount > 0
 
+        deleted = await self._runner.run(_delete)
+        if deleted:
+            self._invalidate_cache(key_id)
+        return deleted
+
     async def get_key_by_id(self, key_id: int) -> Optional[dict]:
         """通过 ID 获取 API Key 详情"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
+        row = await self._runner.run(
+            lambda conn: conn.execute(
                 "SELECT * FROM api_keys WHERE id = ?", (key_id,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return dict(row) if row else None
+            ).fetchone()
+        )
+        return dict(row) if row else None
+
+    async def wal_checkpoint(self) -> tuple:
+        """执行 WAL checkpoint(TRUNCATE)"""
+        return await self._runner.wal_checkpoint()
+
+    def close(self):
+        """关闭数据库执行线程"""
+        self._runner.close()
 
 
 # 单例模式供外部调用
@@ -0,0 +1,45 @@
+import time
+from typing import Optional
+
+from ._sqlite_runner import SQLiteRunner
+from .apikey_storage import DB_PATH as APIKEY_DB_PATH
+from .session_storage import DB_PATH as SESSION_DB_PATH
+
+
+class AuthPrefetch:
+    """鉴权数据预取：通过 ATTACH 把会话库挂到同一连接，
+    一次查询取回签名校验所需的全部数据，避免多次串行往返
+
+    API Key 鉴权走 apikey_storage.get_api_key（带内存缓存及吊销失效），不在此处理。
+    """
+
+    def __init__(self):
+        self._runner = SQLiteRunner(APIKEY_DB_PATH, attach={"s": SESSION_DB_PATH})
+
+    async def prefetch_signature(
+        self, user_id: int, nonce: str
+    ) -> tuple[bool, Optional[str]]:
+        """一次性获取签名校验所需数据
+
+        Returns:
+            (nonce 是否已被使用, 用户未过期的 session_secret 或 None)
+        """
+        now = int(time.time())
+        row = await self._runner.run(
+            lambda conn: conn.execute(
+                """SELECT
+                       EXISTS(SELECT 1 FROM s.nonce_records WHERE nonce = ?),
+                       (SELECT session_secret FROM s.user_sessions
+                        WHERE user_id = ? AND expires_at > ?)""",
+                (nonce, user_id, now),
+            ).fetchone()
+        )
+        return bool(row[0]), row[1]
+
+    def close(self):
+        """关闭数据库执行线程"""
+        self._runner.close()
+
+
+# 单例模式供外部调用
+auth_prefetch = AuthPrefetch()
@@ -0,0 +1,36 @@
+import asyncio
+import logging
+import sqlite3
+
+from .apikey_storage import storage as apikey_storage
+from .session_storage import session_storage
+from .user_storage import storage as user_storage
+
+logger = logging.getLogger(__name__)
+
+# WAL checkpoint 间隔（秒）
+WAL_CHECKPOINT_INTERVAL_SECONDS = 60
+
+
+async def wal_maintenance(interval: float = WAL_CHECKPOINT_INTERVAL_SECONDS):
+    """后台任务：定期对所有存储库执行 wal_checkpoint(TRUNCATE)，防止 WAL 文件持续增长"""
+    storages = {
+        "api_keys": apikey_storage,
+        "sessions": session_storage,
+        "users": user_storage,
+    }
+    while True:
+        await asyncio.sleep(interval)
+        for name, storage in storages.items():
+            try:
+                busy, log_pages, checkpointed = await storage.wal_checkpoint()
+                if busy:
+                    logger.warning(
+                        "WAL checkpoint busy: %s (%d/%d pages)",
+                        name,
+                        checkpointed,
+                        log_pages,
+                    )
+            except sqlite3.OperationalError as e:
+                # 例如 "database is locked"，下个周期重试
+                logger.error("WAL checkpoint failed: %s: %s", name, e)
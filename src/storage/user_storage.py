@@ -1,26 +1,26 @@
-from pathlib import Path
+import sqlite3
 from typing import Optional
 
-import aiosqlite
+from ._paths import DB_DIR
+from ._sqlite_runner import SQLiteRunner
 
 # 数据库路径配置（独立数据库）
-DB_DIR = Path("./data")
 DB_PATH = DB_DIR / "users.db"
 
+# 对外返回的用户字段（不含 password_hash，仅登录校验时才需要读取）
+USER_PUBLIC_COLUMNS = "id, username, email, is_active, is_superuser, created_at"
+
 
 class UserStorage:
     def __init__(self):
-        # 确保目录存在
-        if not DB_DIR.exists():
-            DB_DIR.mkdir(parents=True, exist_ok=True)
+        self._runner = SQLiteRunner(DB_PATH)
 
     async def init_db(self):
         """初始化用户表"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute("PRAGMA journal_mode=WAL;")
 
+        def _init(conn: sqlite3.Connection):
             # 创建用户表
-            await db.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS users (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     username TEXT UNIQUE NOT NULL,
@@ -31,136 +31,161 @@ class UserStorage:
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
-            await db.commit()
+
+            # 显式创建索引，不依赖 UNIQUE 约束隐式生成的索引
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_users_username
+                ON users(username)
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_users_email
+                ON users(email)
+            """)
+            conn.commit()
+
+        await self._runner.run(_init)
+
+    async def _update(self, sql: str, params: tuple) -> bool:
+        """执行单条写语句并提交，返回是否有行受影响"""
+
+        def _execute(conn: sqlite3.Connection) -> bool:
+            cursor = conn.execute(sql, params)
+            conn.commit()
+            return cursor.rowcount > 0
+
+        return await self._runner.run(_execute)
 
     async def create_user(
         self, username: str, email: str, password_hash: str, is_superuser: bool = False
     ) -> Optional[int]:
         """创建新用户，返回用户 ID"""
+
+        def _insert(conn: sqlite3.Connection) -> int:
+            cursor = conn.execute(
+                """INSERT INTO users (username, email, password_hash, is_superuser)
+                   VALUES (?, ?, ?, ?)""",
+                (username, email, password_hash, 1 if is_superuser else 0),
+            )
+            conn.commit()
+            return cursor.lastrowid
+
         try:
-            async with aiosqlite.connect(DB_PATH) as db:
-                cursor = await db.execute(
-                    """INSERT INTO users (username, email, password_hash, is_superuser)
-                       VALUES (?, ?, ?, ?)""",
-                    (username, email, password_hash, 1 if is_superuser else 0),
-                )
-                await db.commit()
-                return cursor.lastrowid
-        except aiosqlite.IntegrityError:
+            return await self._runner.run(_insert)
+        except sqlite3.IntegrityError:
             # 用户名或邮箱已存在
             return None
 
+    async def get_user_full(self, username: str) -> Optional[dict]:
+        """通过用户名获取完整用户信息（含 password_hash，仅用于登录校验）"""
+        row = await self._runner.run(
+            lambda conn: conn.execute(
+                "SELECT * FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        )
+        return dict(row) if row else None
+
     async def get_user_by_username(self, username: str) -> Optional[dict]:
         """通过用户名获取用户信息"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                "SELECT * FROM users WHERE username = ?", (username,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return dict(row) if row else None
+        row = await self._runner.run(
+            lambda conn: conn.execute(
+                f"SELECT {USER_PUBLIC_COLUMNS} FROM users WHERE username = ?",
+                (username,),
+            ).fetchone()
+        )
+        return dict(row) if row else None
 
     async def get_user_by_id(self, user_id: int) -> Optional[dict]:
         """通过 ID 获取用户信息"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                "SELECT * FROM users WHERE id = ?", (user_id,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return dict(row) if row else None
+        row = await self._runner.run(
+            lambda conn: conn.execute(
+                f"SELECT {USER_PUBLIC_COLUMNS} FROM users WHERE id = ?", (user_id,)
+            ).fetchone()
+        )
+        return dict(row) if row else None
 
     async def get_user_by_email(self, email: str) -> Optional[dict]:
         """通过邮箱获取用户信息"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                "SELECT * FROM users WHERE email = ?", (email,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return dict(row) if row else None
+        row = await self._runner.run(
+            lambda conn: conn.execute(
+                f"SELECT {USER_PUBLIC_COLUMNS} FROM users WHERE email = ?", (email,)
+            ).fetchone()
+        )
+        return dict(row) if row else None
 
     async def list_users(self) -> list[dict]:
         """列出所有用户"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                """SELECT id, username, email, is_active, is_superuser, created_at
-                   FROM users ORDER BY created_at DESC"""
-            ) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+        rows = await self._runner.run(
+            lambda conn: conn.execute(f"""SELECT {USER_PUBLIC_COLUMNS}
+                   FROM users ORDER BY created_at DESC""").fetchall()
+        )
+        return [dict(row) for row in rows]
 
     async def deactivate_user(self, user_id: int) -> bool:
         """吊销用户账号（设置 is_active = 0）"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            cursor = await db.execute(
-                "UPDATE users SET is_active = 0 WHERE id = ?", (user_id,)
-            )
-            await db.commit()
-            return cursor.rowcount > 0
+        return await self._update(
+            "UPDATE users SET is_active = 0 WHERE id = ?", (user_id,)
+        )
 
     async def activate_user(self, user_id: int) -> bool:
         """激活用户账号"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            cursor = await db.execute(
-                "UPDATE users SET is_active = 1 WHERE id = ?", (user_id,)
-            )
-            await db.commit()
-            return cursor.rowcount > 0
+        return await self._update(
+            "UPDATE users SET is_active = 1 WHERE id = ?", (user_id,)
+        )
 
     async def promote_to_superuser(self, user_id: int) -> bool:
         """提升用户为超级用户"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            cursor = await db.execute(
-                "UPDATE users SET is_superuser = 1 WHERE id = ?", (user_id,)
-            )
-            await db.commit()
-            return cursor.rowcount > 0
+        return await self._update(
+            "UPDATE users SET is_superuser = 1 WHERE id = ?", (user_id,)
+        )
 
     async def demote_from_superuser(self, user_id: int) -> bool:
         """取消用户超级用户权限"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            cursor = await db.execute(
-                "UPDATE users SET is_superuser = 0 WHERE id = ?", (user_id,)
-            )
-            await db.commit()
-            return cursor.rowcount > 0
+        return await self._update(
+            "UPDATE users SET is_superuser = 0 WHERE id = ?", (user_id,)
+        )
 
     async def count_superusers(self) -> int:
         """统计超级用户数量"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            async with db.execute(
+        row = await self._runner.run(
+            lambda conn: conn.execute(
                 "SELECT COUNT(*) FROM users WHERE is_superuser = 1 AND is_active = 1"
-            ) as cursor:
-                row = await cursor.fetchone()
-                return row[0] if row else 0
+            ).fetchone()
+        )
+        return row[0] if row else 0
 
     async def can_revoke_superuser(self, user_id: int) -> bool:
         """
         检查是否可以吊销/取消该超级用户权限
         规则：必须保留至少一个活跃的超级用户
         """
-        async with aiosqlite.connect(DB_PATH) as db:
-            # 先检查该用户是否是目前唯一的活跃超级用户
-            async with db.execute(
+        # 先检查该用户是否是目前唯一的活跃超级用户
+        row = await self._runner.run(
+            lambda conn: conn.execute(
                 """SELECT COUNT(*) FROM users
                    WHERE is_superuser = 1 AND is_active = 1 AND id != ?""",
                 (user_id,),
-            ) as cursor:
-                row = await cursor.fetchone()
-                other_superusers = row[0] if row else 0
-                return other_superusers > 0
+            ).fetchone()
+        )
+        other_superusers = row[0] if row else 0
+        return other_superusers > 0
 
     async def is_superuser(self, user_id: int) -> bool:
-        """检查用户是否为超级用户"""
-        async with aiosqlite.connect(DB_PATH) as db:
-            async with db.execute(
-                "SELECT is_superuser FROM users WHERE id = ? AND is_active = 1",
+        """检查用户是否为活跃的超级用户（只查询这一项，不读取整行）"""
+        row = await self._runner.run(
+            lambda conn: conn.execute(
+                "SELECT 1 FROM users WHERE id = ? AND is_superuser = 1 AND is_active = 1",
                 (user_id,),
-            ) as cursor:
-                row = await cursor.fetchone()
-                return bool(row[0]) if row else False
+            ).fetchone()
+        )
+        return row is not None
+
+    async def wal_checkpoint(self) -> tuple:
+        """执行 WAL checkpoint(TRUNCATE)"""
+        return await self._runner.wal_checkpoint()
+
+    def close(self):
+        """关闭数据库执行线程"""
+        self._runner.close()
 
 
 # 单例模式供外部调用
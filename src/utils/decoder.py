@@ -1,6 +1,12 @@
 import json
+import re
 from pathlib import Path
 
+import orjson
+
+# SSE data 字段：行首 "data:"（冒号后的单个空格可选），取到行尾
+_DATA_RE = re.compile(r"^[ \t]*data: ?([^\r\n]*)", re.MULTILINE)
+
 
 class SSEDecoder:
     def __init__(self):
@@ -10,32 +16,31 @@ class SSEDecoder:
         """
         解析逻辑：
         1. 将新到的 chunk 放入缓冲区
-        2. 寻找双换行符 (\n\n)，这是 SSE 标准的消息分隔符
-        3. 提取 data: 之后的内容进行 JSON 解析
+        2. 找到最后一个双换行符 (\n\n)，之前的都是完整的 SSE 消息
+        3. 用预编译正则一次扫描出所有 data: 字段并进行 JSON 解析
         """
         self.buffer += chunk
 
-        # SSE 消息通常以 \n\n 结尾
-        while "\n\n" in self.buffer:
-            message, self.buffer = self.buffer.split("\n\n", 1)
-
-            for line in message.split("\n"):
-                line = line.strip()
-                if not line or not line.startswith("data: "):
-                    continue
+        # SSE 消息以 \n\n 结尾，只处理已完整到达的部分
+        end = self.buffer.rfind("\n\n")
+        if end == -1:
+            return
+        complete, self.buffer = self.buffer[: end + 2], self.buffer[end + 2 :]
 
-                # 提取 data: 之后的数据
-                data_content = line[len("data: ") :]
+        for match in _DATA_RE.finditer(complete):
+            data_content = match.group(1).strip()
+            if not data_content:
+                continue
 
-                # 检查是否结束
-                if data_content == "[DONE]":
-                    return
+            # 检查是否结束
+            if data_content == "[DONE]":
+                return
 
-                try:
-                    yield json.loads(data_content)
-                except json.JSONDecodeError:
-                    # 记录错误或忽略不完整的 JSON
-                    continue
+            try:
+                yield orjson.loads(data_content)
+            except orjson.JSONDecodeError:
+                # 记录错误或忽略不完整的 JSON
+                continue
 
 
 def run_test():
@@ -50,6 +55,9 @@ def run_test():
     print("--- 开始解析流式数据 ---")
 
     final_message = {"role": "assistant", "content": "", "tool_calls": []}
+    # 增量片段先收集到列表，解析结束后统一 join，避免 str += 的反复拷贝
+    content_buf: list[str] = []
+    arg_bufs: dict[int, list[str]] = {}
 
     for i, chunk in enumerate(chunks):
         print(f"收到 Chunk {i}...")
@@ -66,7 +74,7 @@ def run_test():
 
             # 2. 还原 Content (文本内容拼接)
             if "content" in delta and delta["content"]:
-                final_message["content"] += delta["content"]
+                content_buf.append(delta["content"])
                 # 实时显示（模拟打字机）
                 print(delta["content"], end="", flush=True)
 
@@ -98,11 +106,15 @@ def run_test():
                             target_tc["function"]["name"] += fn_delta["name"]
                         # 累加参数片段
                         if "arguments" in fn_delta:
-                            target_tc["function"]["arguments"] += fn_delta["arguments"]
+                            arg_bufs.setdefault(index, []).append(fn_delta["arguments"])
                             # 只有在 arguments 开始产生时才打印提示
                             if not target_tc["function"]["name"]:
                                 print("\n[正在生成工具参数...]")
 
+    final_message["content"] = "".join(content_buf)
+    for index, parts in arg_bufs.items():
+        final_message["tool_calls"][index]["function"]["arguments"] = "".join(parts)
+
     print("\n--- 解析完成 ---")
     print(f"完整回复内容: {final_message}")
 
@@ -0,0 +1,66 @@
+"""SSE 字节流切分
+
+按空行切分事件，兼容 ``\\r\\n`` / ``\\r`` 行结束符；Provider 的异步流与测试脚本的同步流共用。
+"""
+
+from typing import Iterable, Iterator, Optional
+
+
+class SSEFrameSplitter:
+    """增量切分 SSE 字节流
+
+    feed() 喂入数据块，返回其中已完整的事件（原始字节，不含结尾空行）；
+    流结束后调用 flush() 取出残留的最后一个事件（上游未以空行结尾）。
+    """
+
+    __slots__ = ("_buf", "_pending_cr")
+
+    def __init__(self):
+        self._buf = bytearray()
+        # 块末尾的 \r 可能与下一块开头的 \n 组成 \r\n，留到下一块再处理
+        self._pending_cr = False
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        if self._pending_cr:
+            chunk = b"\r" + chunk
+        self._pending_cr = chunk.endswith(b"\r")
+        if self._pending_cr:
+            chunk = chunk[:-1]
+        # 含 \r 的块统一换成 \n，不含 \r 的块直接在 bytearray 上查找 \n\n
+        if b"\r" in chunk:
+            chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        buf = self._buf
+        buf += chunk
+        frames = []
+        while (idx := buf.find(b"\n\n")) != -1:
+            frame = bytes(buf[:idx])
+            del buf[: idx + 2]
+            if frame:
+                frames.append(frame)
+        return frames
+
+    def flush(self) -> Optional[bytes]:
+        frame = bytes(self._buf).strip(b"\n")
+        self._buf.clear()
+        self._pending_cr = False
+        return frame if frame.strip() else None
+
+
+def iter_sse_frames_sync(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """同步版：把字节块序列切分为 SSE 事件"""
+    splitter = SSEFrameSplitter()
+    for chunk in chunks:
+        yield from splitter.feed(chunk)
+    if (frame := splitter.flush()) is not None:
+        yield frame
+
+
+def iter_sse_data(response, chunk_size: int = 8192) -> Iterator[bytes]:
+    """逐个产出 requests 流式响应中 data 字段的负载（bytes），遇到 [DONE] 结束"""
+    for frame in iter_sse_frames_sync(response.iter_content(chunk_size=chunk_size)):
+        for line in frame.split(b"\n"):
+            if line.startswith(b"data: "):
+                payload = line[6:]
+                if payload == b"[DONE]":
+                    return
+                yield payload
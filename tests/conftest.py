@@ -0,0 +1,25 @@
+"""pytest 共享配置与 hook"""
+
+import os
+
+import pytest
+
+# 真实 API 集成测试类 -> (环境变量, 默认占位值)
+REAL_API_KEYS = {
+    "TestDeepSeekProviderIntegration": ("DEEPSEEK_API_KEY", "test-api-key"),
+    "TestKimiProviderIntegration": ("KIMI_API_KEY", "test-kimi-key"),
+}
+
+
+def pytest_collection_modifyitems(config, items):
+    """收集阶段一次性跳过未配置真实 API Key 的集成测试"""
+    skip_markers = {}
+    for name, (env_name, default) in REAL_API_KEYS.items():
+        if os.getenv(env_name, default) == default:
+            skip_markers[name] = pytest.mark.skip(reason=f"没有配置真实的 {env_name}")
+    if not skip_markers:
+        return
+    for item in items:
+        marker = skip_markers.get(getattr(item.cls, "__name__", None))
+        if marker is not None:
+            item.add_marker(marker)
@@ -1,12 +1,17 @@
 """单元测试：测试 DeepSeek 和 Kimi Provider 的接口"""
 
-import json
+import asyncio
 import os
-from unittest.mock import AsyncMock, MagicMock, patch
+import sys
 
 from dotenv import load_dotenv
+import httpx
+import msgspec
+import orjson
 import pytest
+import pytest_asyncio
 
+from src.models.provider import ModelsResponse
 from src.providers import DeepSeekProvider, KimiProvider
 from src.providers.deepseek import merge_tool_content
 
@@ -20,6 +25,13 @@ KIMI_API_KEY = os.getenv("KIMI_API_KEY", "test-kimi-key")
 KIMI_BASE_URL = os.getenv("KIMI_BASE_URL", "https://api.moonshot.cn")
 
 
+def _dump(obj):
+    """以缩进 JSON 打印对象（orjson 直接写入 stdout 的字节缓冲区）"""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2) + b"\n")
+    sys.stdout.buffer.flush()
+
+
 # =============================================================================
 # DeepSeek Provider Tests
 # =============================================================================
@@ -28,13 +40,16 @@ KIMI_BASE_URL = os.getenv("KIMI_BASE_URL", "https://api.moonshot.cn")
 class TestDeepSeekProvider:
     """测试 DeepSeekProvider 类"""
 
-    @pytest.fixture
-    def provider(self):
-        """创建测试用的 provider 实例"""
-        return DeepSeekProvider(
+    @pytest_asyncio.fixture(scope="class")
+    @classmethod
+    async def provider(cls):
+        """创建测试用的 provider 实例（整个测试类共享，请求由 respx 拦截）"""
+        provider = DeepSeekProvider(
             base_url=DEEPSEEK_BASE_URL,
             api_key=DEEPSEEK_API_KEY
         )
+        yield provider
+        await provider.aclose()
 
     @pytest.fixture
     def sample_payload(self):
@@ -111,97 +126,106 @@ class TestDeepSeekProvider:
         assert "Tool result" in tool_msg["content"]
 
     @pytest.mark.asyncio
-    async def test_chat_completions_success(self, provider, sample_payload, sample_response):
+    async def test_chat_completions_success(self, provider, respx_mock, sample_payload, sample_response):
         """测试 chat_completions 成功调用"""
-        mock_response = MagicMock()
-        mock_response.json.return_value = sample_response
-        mock_response.raise_for_status.return_value = None
-
-        mock_client = AsyncMock()
-        mock_client.post.return_value = mock_response
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
+        route = respx_mock.post(f"{DEEPSEEK_BASE_URL}/chat/completions").mock(
+            return_value=httpx.Response(200, json=sample_response)
+        )
 
-        with patch("httpx.AsyncClient", return_value=mock_client):
-            result = await provider.chat_completions(sample_payload)
+        result = await provider.chat_completions(sample_payload)
 
         assert result == sample_response
-        mock_client.post.assert_called_once()
-        call_args = mock_client.post.call_args
-        assert call_args[0][0] == f"{DEEPSEEK_BASE_URL}/chat/completions"
-        assert call_args[1]["json"]["model"] == "deepseek-chat"
+        assert route.call_count == 1
+        request = route.calls.last.request
+        assert request.headers["Authorization"] == f"Bearer {DEEPSEEK_API_KEY}"
+        assert orjson.loads(request.content)["model"] == "deepseek-chat"
 
     @pytest.mark.asyncio
-    async def test_chat_completions_http_error(self, provider, sample_payload):
+    async def test_chat_completions_http_error(self, provider, respx_mock, sample_payload):
         """测试 chat_completions HTTP 错误处理"""
-        mock_response = MagicMock()
-        mock_response.raise_for_status.side_effect = Exception("HTTP Error")
-
-        mock_client = AsyncMock()
-        mock_client.post.return_value = mock_response
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
+        respx_mock.post(f"{DEEPSEEK_BASE_URL}/chat/completions").mock(
+            return_value=httpx.Response(500, text="Internal Server Error")
+        )
 
-        with patch("httpx.AsyncClient", return_value=mock_client):
-            with pytest.raises(Exception) as exc_info:
-                await provider.chat_completions(sample_payload)
-            assert "HTTP Error" in str(exc_info.value)
+        with pytest.raises(httpx.HTTPStatusError) as exc_info:
+            await provider.chat_completions(sample_payload)
+        assert exc_info.value.response.status_code == 500
 
     @pytest.mark.asyncio
-    async def test_chat_completions_stream_success(self, provider):
+    async def test_chat_completions_stream_success(self, provider, respx_mock):
         """测试流式响应成功"""
         payload = {"model": "deepseek-chat",
                    "messages": [{"role": "user", "content": "Hello"}]}
 
-        mock_stream_response = MagicMock()
-        mock_stream_response.status_code = 200
-        mock_stream_response.aiter_lines = MagicMock(return_value=AsyncIteratorMock([
-            "data: {}",
-            "data: {}",
-            ""
-        ]))
-        mock_stream_response.__aenter__ = AsyncMock(
-            return_value=mock_stream_response)
-        mock_stream_response.__aexit__ = AsyncMock(return_value=None)
-
-        # stream() 返回一个异步上下文管理器，所以需要设置为 AsyncMock
-        mock_client = AsyncMock()
-        mock_client.stream = MagicMock(return_value=mock_stream_response)
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
-
-        with patch("httpx.AsyncClient", return_value=mock_client):
-            lines = []
-            async for line in provider.chat_completions_stream(payload):
-                lines.append(line)
+        respx_mock.post(f"{DEEPSEEK_BASE_URL}/chat/completions").mock(
+            return_value=httpx.Response(200, content=async_chunks([
+                b"data: {}\n",
+                b"\ndata: {",
+                b"}\n\n"
+            ]))
+        )
+
+        lines = []
+        async for line in provider.chat_completions_stream(payload):
+            lines.append(line)
 
         assert len(lines) == 2
 
     @pytest.mark.asyncio
-    async def test_chat_completions_stream_error(self, provider):
-        """测试流式响应错误处理"""
+    async def test_chat_completions_stream_crlf(self, provider, respx_mock):
+        """测试以 \\r\\n 分隔的流式响应（\\r 与 \\n 落在不同块上）"""
         payload = {"model": "deepseek-chat",
                    "messages": [{"role": "user", "content": "Hello"}]}
 
-        mock_stream_response = MagicMock()
-        mock_stream_response.status_code = 401
-        mock_stream_response.aread = AsyncMock(return_value=b"Unauthorized")
-        mock_stream_response.__aenter__ = AsyncMock(
-            return_value=mock_stream_response)
-        mock_stream_response.__aexit__ = AsyncMock(return_value=None)
+        respx_mock.post(f"{DEEPSEEK_BASE_URL}/chat/completions").mock(
+            return_value=httpx.Response(200, content=async_chunks([
+                b"data: {\"a\":1}\r\n\r",
+                b"\ndata: {\"b\":2}\r\n\r\n",
+                b"data: [DONE]\r\r",
+            ]))
+        )
 
-        mock_client = AsyncMock()
-        mock_client.stream.return_value = mock_stream_response
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
+        lines = []
+        async for line in provider.chat_completions_stream(payload):
+            lines.append(line)
 
-        with patch("httpx.AsyncClient", return_value=mock_client):
-            with pytest.raises(Exception):
-                async for _ in provider.chat_completions_stream(payload):
-                    pass
+        assert lines == [b'data: {"a":1}', b'data: {"b":2}', b"data: [DONE]"]
 
     @pytest.mark.asyncio
-    async def test_list_models_success(self, provider):
+    async def test_chat_completions_stream_trailing_frame(self, provider, respx_mock):
+        """测试最后一个事件没有以空行结尾"""
+        payload = {"model": "deepseek-chat",
+                   "messages": [{"role": "user", "content": "Hello"}]}
+
+        respx_mock.post(f"{DEEPSEEK_BASE_URL}/chat/completions").mock(
+            return_value=httpx.Response(200, content=async_chunks([
+                b"data: {}\n\n",
+                b"data: [DONE]\r\n",
+            ]))
+        )
+
+        lines = []
+        async for line in provider.chat_completions_stream(payload):
+            lines.append(line)
+
+        assert lines == [b"data: {}", b"data: [DONE]"]
+
+    @pytest.mark.asyncio
+    async def test_chat_completions_stream_error(self, provider, respx_mock):
+        """测试流式响应错误处理"""
+        payload = {"model": "deepseek-chat",
+                   "messages": [{"role": "user", "content": "Hello"}]}
+
+        respx_mock.post(f"{DEEPSEEK_BASE_URL}/chat/completions").mock(
+            return_value=httpx.Response(401, text="Unauthorized")
+        )
+
+        with pytest.raises(httpx.HTTPStatusError):
+            async for _ in provider.chat_completions_stream(payload):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_list_models_success(self, provider, respx_mock):
         """测试获取模型列表成功"""
         sample_models = {
             "object": "list",
@@ -221,38 +245,46 @@ class TestDeepSeekProvider:
             ]
         }
 
-        mock_response = MagicMock()
-        mock_response.json.return_value = sample_models
-        mock_response.raise_for_status.return_value = None
+        route = respx_mock.get(f"{DEEPSEEK_BASE_URL}/models").mock(
+            return_value=httpx.Response(200, json=sample_models)
+        )
+
+        result = await provider.list_models()
+
+        assert isinstance(result, ModelsResponse)
+        assert result.data[0].id == sample_models["data"][0]["id"]
+        assert msgspec.to_builtins(result) == sample_models
+        assert route.call_count == 1
 
-        mock_client = AsyncMock()
-        mock_client.get.return_value = mock_response
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
+    @pytest.mark.asyncio
+    async def test_list_models_loose_created(self, provider, respx_mock):
+        """测试 created 为浮点数或数字字符串时仍能解码整个模型列表"""
+        respx_mock.get(f"{DEEPSEEK_BASE_URL}/models").mock(
+            return_value=httpx.Response(200, json={
+                "object": "list",
+                "data": [
+                    {"id": "float-model", "created": 1234567890.5},
+                    {"id": "str-model", "created": "1234567891"},
+                    {"id": "null-model", "created": None},
+                ]
+            })
+        )
 
-        with patch("httpx.AsyncClient", return_value=mock_client):
-            result = await provider.list_models()
+        result = await provider.list_models()
 
-        assert result == sample_models
-        mock_client.get.assert_called_once()
-        call_args = mock_client.get.call_args
-        assert call_args[0][0] == f"{DEEPSEEK_BASE_URL}/models"
+        assert [m.id for m in result.data] == ["float-model", "str-model", "null-model"]
+        assert [m.created for m in result.data] == [1234567890.5, 1234567891, None]
 
     @pytest.mark.asyncio
-    async def test_list_models_http_error(self, provider):
+    async def test_list_models_http_error(self, provider, respx_mock):
         """测试获取模型列表 HTTP 错误"""
-        mock_response = MagicMock()
-        mock_response.raise_for_status.side_effect = Exception("API Error")
-
-        mock_client = AsyncMock()
-        mock_client.get.return_value = mock_response
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
+        respx_mock.get(f"{DEEPSEEK_BASE_URL}/models").mock(
+            return_value=httpx.Response(401, text="Unauthorized")
+        )
 
-        with patch("httpx.AsyncClient", return_value=mock_client):
-            with pytest.raises(Exception) as exc_info:
-                await provider.list_models()
-            assert "API Error" in str(exc_info.value)
+        with pytest.raises(httpx.HTTPStatusError) as exc_info:
+            await provider.list_models()
+        assert exc_info.value.response.status_code == 401
 
 
 # =============================================================================
@@ -263,13 +295,16 @@ class TestDeepSeekProvider:
 class TestKimiProvider:
     """测试 KimiProvider 类"""
 
-    @pytest.fixture
-    def provider(self):
-        """创建测试用的 provider 实例"""
-        return KimiProvider(
+    @pytest_asyncio.fixture(scope="class")
+    @classmethod
+    async def provider(cls):
+        """创建测试用的 provider 实例（整个测试类共享，请求由 respx 拦截）"""
+        provider = KimiProvider(
             base_url=KIMI_BASE_URL,
             api_key=KIMI_API_KEY
         )
+        yield provider
+        await provider.aclose()
 
     @pytest.fixture
     def sample_payload(self):
@@ -314,96 +349,65 @@ class TestKimiProvider:
         assert headers["Accept"] == "application/json"
 
     @pytest.mark.asyncio
-    async def test_chat_completions_success(self, provider, sample_payload, sample_response):
+    async def test_chat_completions_success(self, provider, respx_mock, sample_payload, sample_response):
         """测试 chat_completions 成功调用"""
-        mock_response = MagicMock()
-        mock_response.json.return_value = sample_response
-        mock_response.raise_for_status.return_value = None
-
-        mock_client = AsyncMock()
-        mock_client.post.return_value = mock_response
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
+        route = respx_mock.post(f"{KIMI_BASE_URL}/chat/completions").mock(
+            return_value=httpx.Response(200, json=sample_response)
+        )
 
-        with patch("httpx.AsyncClient", return_value=mock_client):
-            result = await provider.chat_completions(sample_payload)
+        result = await provider.chat_completions(sample_payload)
 
         assert result == sample_response
-        mock_client.post.assert_called_once()
-        call_args = mock_client.post.call_args
-        assert call_args[0][0] == f"{KIMI_BASE_URL}/chat/completions"
+        assert route.call_count == 1
+        request = route.calls.last.request
+        assert request.headers["Authorization"] == f"Bearer {KIMI_API_KEY}"
 
     @pytest.mark.asyncio
-    async def test_chat_completions_http_error(self, provider, sample_payload):
+    async def test_chat_completions_http_error(self, provider, respx_mock, sample_payload):
         """测试 chat_completions HTTP 错误处理"""
-        mock_response = MagicMock()
-        mock_response.raise_for_status.side_effect = Exception("API Error")
-
-        mock_client = AsyncMock()
-        mock_client.post.return_value = mock_response
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
+        respx_mock.post(f"{KIMI_BASE_URL}/chat/completions").mock(
+            return_value=httpx.Response(500, text="Internal Server Error")
+        )
 
-        with patch("httpx.AsyncClient", return_value=mock_client):
-            with pytest.raises(Exception) as exc_info:
-                await provider.chat_completions(sample_payload)
-            assert "API Error" in str(exc_info.value)
+        with pytest.raises(httpx.HTTPStatusError) as exc_info:
+            await provider.chat_completions(sample_payload)
+        assert exc_info.value.response.status_code == 500
 
     @pytest.mark.asyncio
-    async def test_chat_completions_stream_success(self, provider):
+    async def test_chat_completions_stream_success(self, provider, respx_mock):
         """测试流式响应成功"""
         payload = {"model": "moonshot-v1-8k",
                    "messages": [{"role": "user", "content": "Hello"}]}
 
-        mock_stream_response = MagicMock()
-        mock_stream_response.status_code = 200
-        mock_stream_response.aiter_lines = MagicMock(return_value=AsyncIteratorMock([
-            'data: {"id":"1","choices":[{"delta":{"content":"Hi"}}]}',
-            'data: {"id":"1","choices":[{"delta":{"content":" there"}}]}',
-            ""
-        ]))
-        mock_stream_response.__aenter__ = AsyncMock(
-            return_value=mock_stream_response)
-        mock_stream_response.__aexit__ = AsyncMock(return_value=None)
-
-        # stream() 返回一个异步上下文管理器，所以需要设置为 MagicMock
-        mock_client = AsyncMock()
-        mock_client.stream = MagicMock(return_value=mock_stream_response)
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
-
-        with patch("httpx.AsyncClient", return_value=mock_client):
-            lines = []
-            async for line in provider.chat_completions_stream(payload):
-                lines.append(line)
+        respx_mock.post(f"{KIMI_BASE_URL}/chat/completions").mock(
+            return_value=httpx.Response(200, content=async_chunks([
+                b'data: {"id":"1","choices":[{"delta":{"content":"Hi"}}]}\n\n',
+                b'data: {"id":"1","choices":[{"delta":{"content":" there"}}]}\n\n'
+            ]))
+        )
+
+        lines = []
+        async for line in provider.chat_completions_stream(payload):
+            lines.append(line)
 
         assert len(lines) == 2
 
     @pytest.mark.asyncio
-    async def test_chat_completions_stream_error(self, provider):
+    async def test_chat_completions_stream_error(self, provider, respx_mock):
         """测试流式响应错误处理"""
         payload = {"model": "moonshot-v1-8k",
                    "messages": [{"role": "user", "content": "Hello"}]}
 
-        mock_stream_response = MagicMock()
-        mock_stream_response.status_code = 429
-        mock_stream_response.aread = AsyncMock(return_value=b"Rate Limited")
-        mock_stream_response.__aenter__ = AsyncMock(
-            return_value=mock_stream_response)
-        mock_stream_response.__aexit__ = AsyncMock(return_value=None)
-
-        mock_client = AsyncMock()
-        mock_client.stream.return_value = mock_stream_response
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
+        respx_mock.post(f"{KIMI_BASE_URL}/chat/completions").mock(
+            return_value=httpx.Response(429, text="Rate Limited")
+        )
 
-        with patch("httpx.AsyncClient", return_value=mock_client):
-            with pytest.raises(Exception):
-                async for _ in provider.chat_completions_stream(payload):
-                    pass
+        with pytest.raises(httpx.HTTPStatusError):
+            async for _ in provider.chat_completions_stream(payload):
+                pass
 
     @pytest.mark.asyncio
-    async def test_list_models_success(self, provider):
+    async def test_list_models_success(self, provider, respx_mock):
         """测试获取模型列表成功"""
         sample_models = {
             "object": "list",
@@ -423,38 +427,27 @@ class TestKimiProvider:
             ]
         }
 
-        mock_response = MagicMock()
-        mock_response.json.return_value = sample_models
-        mock_response.raise_for_status.return_value = None
-
-        mock_client = AsyncMock()
-        mock_client.get.return_value = mock_response
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
+        route = respx_mock.get(f"{KIMI_BASE_URL}/models").mock(
+            return_value=httpx.Response(200, json=sample_models)
+        )
 
-        with patch("httpx.AsyncClient", return_value=mock_client):
-            result = await provider.list_models()
+        result = await provider.list_models()
 
-        assert result == sample_models
-        mock_client.get.assert_called_once()
-        call_args = mock_client.get.call_args
-        assert call_args[0][0] == f"{KIMI_BASE_URL}/models"
+        assert isinstance(result, ModelsResponse)
+        assert result.data[0].id == sample_models["data"][0]["id"]
+        assert msgspec.to_builtins(result) == sample_models
+        assert route.call_count == 1
 
     @pytest.mark.asyncio
-    async def test_list_models_http_error(self, provider):
+    async def test_list_models_http_error(self, provider, respx_mock):
         """测试获取模型列表 HTTP 错误"""
-        mock_response = MagicMock()
-        mock_response.raise_for_status.side_effect = Exception("API Error")
-
-        mock_client = AsyncMock()
-        mock_client.get.return_value = mock_response
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=None)
+        respx_mock.get(f"{KIMI_BASE_URL}/models").mock(
+            return_value=httpx.Response(401, text="Unauthorized")
+        )
 
-        with patch("httpx.AsyncClient", return_value=mock_client):
-            with pytest.raises(Exception) as exc_info:
-                await provider.list_models()
-            assert "API Error" in str(exc_info.value)
+        with pytest.raises(httpx.HTTPStatusError) as exc_info:
+            await provider.list_models()
+        assert exc_info.value.response.status_code == 401
 
 
 # =============================================================================
@@ -470,12 +463,16 @@ class TestMergeToolContent:
         msg = {"role": "user", "content": "Hello"}
         result = merge_tool_content(msg)
         assert result == msg
+        # 无需处理时直接返回原对象，不做拷贝
+        assert result is msg
 
     def test_merge_none_content(self):
         """测试 None 内容保持不变"""
         msg = {"role": "user", "content": None}
         result = merge_tool_content(msg)
         assert result == msg
+        # 无需处理时直接返回原对象，不做拷贝
+        assert result is msg
 
     def test_merge_text_block(self):
         """测试合并文本块"""
@@ -564,26 +561,26 @@ class TestMergeToolContent:
 # Integration Tests - 真实 API 请求
 # =============================================================================
 
-# 检查是否有真实的 API Key（不是默认值）
-HAS_REAL_DEEPSEEK_KEY = DEEPSEEK_API_KEY != "test-api-key"
-HAS_REAL_KIMI_KEY = KIMI_API_KEY != "test-kimi-key"
+# 没有配置真实 API Key 时，conftest.py 的 pytest_collection_modifyitems 会跳过整个类
 
 
 class TestDeepSeekProviderIntegration:
     """DeepSeek 真实 API 集成测试"""
 
-    @pytest.fixture
-    def provider(self):
-        """创建真实的 provider 实例"""
-        return DeepSeekProvider(
+    @pytest_asyncio.fixture(scope="class")
+    @classmethod
+    async def provider(cls):
+        """创建真实的 provider 实例（整个测试类共享同一个连接池）"""
+        provider = DeepSeekProvider(
             base_url=DEEPSEEK_BASE_URL,
             api_key=DEEPSEEK_API_KEY
         )
+        yield provider
+        await provider.aclose()
 
     @pytest.mark.asyncio
-    @pytest.mark.skipif(not HAS_REAL_DEEPSEEK_KEY, reason="没有配置真实的 DEEPSEEK_API_KEY")
-    async def test_chat_completions_real(self, provider):
-        """测试真实的 chat_completions 调用（打印响应）"""
+    async def test_chat_completions_and_list_models_real(self, provider):
+        """测试真实的 chat_completions 与获取模型列表（并发请求，打印响应）"""
         payload = {
             "model": "deepseek-chat",
             "messages": [
@@ -593,16 +590,21 @@ class TestDeepSeekProviderIntegration:
         }
 
         print("\n" + "=" * 60)
-        print("发送请求到 DeepSeek API...")
-        print(f"URL: {DEEPSEEK_BASE_URL}/chat/completions")
+        print("并发发送请求到 DeepSeek API...")
+        print(f"URL: {DEEPSEEK_BASE_URL}/chat/completions, {DEEPSEEK_BASE_URL}/models")
         print(f"Model: {payload['model']}")
         print(f"Messages: {payload['messages']}")
         print("=" * 60)
 
-        result = await provider.chat_completions(payload)
+        # 两个请求互不依赖，并发执行（复用同一个连接池）
+        result, models = await asyncio.gather(
+            provider.chat_completions(payload), provider.list_models()
+        )
 
         print("\n【DeepSeek 响应】")
-        print(json.dumps(result, ensure_ascii=False, indent=2))
+        _dump(result)
+        print("\n【DeepSeek 模型列表】")
+        _dump(msgspec.to_builtins(models))
         print("=" * 60)
 
         # 验证响应结构
@@ -613,8 +615,11 @@ class TestDeepSeekProviderIntegration:
         assert "content" in result["choices"][0]["message"]
         print(f"✅ 响应内容: {result['choices'][0]['message']['content'][:50]}...")
 
+        assert models.object == "list"
+        assert len(models.data) > 0
+        print(f"✅ 共获取到 {len(models.data)} 个模型")
+
     @pytest.mark.asyncio
-    @pytest.mark.skipif(not HAS_REAL_DEEPSEEK_KEY, reason="没有配置真实的 DEEPSEEK_API_KEY")
     async def test_chat_completions_stream_real(self, provider):
         """测试真实的流式响应（打印响应）"""
         payload = {
@@ -631,52 +636,31 @@ class TestDeepSeekProviderIntegration:
 
         chunks = []
         async for line in provider.chat_completions_stream(payload):
-            if line.startswith("data: ") and line != "data: [DONE]":
+            if line.startswith(b"data: ") and line != b"data: [DONE]":
                 chunks.append(line)
-                print(f"  📦 {line}...")
+                print(f"  📦 {line.decode()}...")
 
         print("=" * 60)
         print(f"✅ 共收到 {len(chunks)} 个数据块")
         assert len(chunks) > 0
 
-    @pytest.mark.asyncio
-    @pytest.mark.skipif(not HAS_REAL_DEEPSEEK_KEY, reason="没有配置真实的 DEEPSEEK_API_KEY")
-    async def test_list_models_real(self, provider):
-        """测试真实的获取模型列表（打印响应）"""
-        print("\n" + "=" * 60)
-        print("发送请求到 DeepSeek API 获取模型列表...")
-        print(f"URL: {DEEPSEEK_BASE_URL}/models")
-        print("=" * 60)
-
-        result = await provider.list_models()
-
-        print("\n【DeepSeek 模型列表】")
-        print(json.dumps(result, ensure_ascii=False, indent=2))
-        print("=" * 60)
-
-        # 验证响应结构
-        assert "object" in result
-        assert result["object"] == "list"
-        assert "data" in result
-        assert len(result["data"]) > 0
-        print(f"✅ 共获取到 {len(result['data'])} 个模型")
-
-
 class TestKimiProviderIntegration:
     """Kimi 真实 API 集成测试"""
 
-    @pytest.fixture
-    def provider(self):
-        """创建真实的 provider 实例"""
-        return KimiProvider(
+    @pytest_asyncio.fixture(scope="class")
+    @classmethod
+    async def provider(cls):
+        """创建真实的 provider 实例（整个测试类共享同一个连接池）"""
+        provider = KimiProvider(
             base_url=KIMI_BASE_URL,
             api_key=KIMI_API_KEY
         )
+        yield provider
+        await provider.aclose()
 
     @pytest.mark.asyncio
-    @pytest.mark.skipif(not HAS_REAL_KIMI_KEY, reason="没有配置真实的 KIMI_API_KEY")
-    async def test_chat_completions_real(self, provider):
-        """测试真实的 chat_completions 调用（打印响应）"""
+    async def test_chat_completions_and_list_models_real(self, provider):
+        """测试真实的 chat_completions 与获取模型列表（并发请求，打印响应）"""
         payload = {
             "model": "moonshot-v1-8k",
             "messages": [
@@ -686,16 +670,21 @@ class TestKimiProviderIntegration:
         }
 
         print("\n" + "=" * 60)
-        print("发送请求到 Kimi API...")
-        print(f"URL: {KIMI_BASE_URL}/chat/completions")
+        print("并发发送请求到 Kimi API...")
+        print(f"URL: {KIMI_BASE_URL}/chat/completions, {KIMI_BASE_URL}/models")
         print(f"Model: {payload['model']}")
         print(f"Messages: {payload['messages']}")
         print("=" * 60)
 
-        result = await provider.chat_completions(payload)
+        # 两个请求互不依赖，并发执行（复用同一个连接池）
+        result, models = await asyncio.gather(
+            provider.chat_completions(payload), provider.list_models()
+        )
 
         print("\n【Kimi 响应】")
-        print(json.dumps(result, ensure_ascii=False, indent=2))
+        _dump(result)
+        print("\n【Kimi 模型列表】")
+        _dump(msgspec.to_builtins(models))
         print("=" * 60)
 
         # 验证响应结构
@@ -706,8 +695,11 @@ class TestKimiProviderIntegration:
         assert "content" in result["choices"][0]["message"]
         print(f"✅ 响应内容: {result['choices'][0]['message']['content'][:50]}...")
 
+        assert models.object == "list"
+        assert len(models.data) > 0
+        print(f"✅ 共获取到 {len(models.data)} 个模型")
+
     @pytest.mark.asyncio
-    @pytest.mark.skipif(not HAS_REAL_KIMI_KEY, reason="没有配置真实的 KIMI_API_KEY")
     async def test_chat_completions_stream_real(self, provider):
         """测试真实的流式响应（打印响应）"""
         payload = {
@@ -724,55 +716,20 @@ class TestKimiProviderIntegration:
 
         chunks = []
         async for line in provider.chat_completions_stream(payload):
-            if line.startswith("data: ") and line != "data: [DONE]":
+            if line.startswith(b"data: ") and line != b"data: [DONE]":
                 chunks.append(line)
-                print(f"  📦 {line}...")
+                print(f"  📦 {line.decode()}...")
 
         print("=" * 60)
         print(f"✅ 共收到 {len(chunks)} 个数据块")
         assert len(chunks) > 0
 
-    @pytest.mark.asyncio
-    @pytest.mark.skipif(not HAS_REAL_KIMI_KEY, reason="没有配置真实的 KIMI_API_KEY")
-    async def test_list_models_real(self, provider):
-        """测试真实的获取模型列表（打印响应）"""
-        print("\n" + "=" * 60)
-        print("发送请求到 Kimi API 获取模型列表...")
-        print(f"URL: {KIMI_BASE_URL}/models")
-        print("=" * 60)
-
-        result = await provider.list_models()
-
-        print("\n【Kimi 模型列表】")
-        print(json.dumps(result, ensure_ascii=False, indent=2))
-        print("=" * 60)
-
-        # 验证响应结构
-        assert "object" in result
-        assert result["object"] == "list"
-        assert "data" in result
-        assert len(result["data"]) > 0
-        print(f"✅ 共获取到 {len(result['data'])} 个模型")
-
-
 # =============================================================================
-# Helper Classes
+# Helper Functions
 # =============================================================================
 
 
-class AsyncIteratorMock:
-    """用于 mock 异步迭代的辅助类"""
-
-    def __init__(self, items):
-        self.items = items
-        self.index = 0
-
-    def __aiter__(self):
-        return self
-
-    async def __anext__(self):
-        if self.index >= len(self.items):
-            raise StopAsyncIteration
-        item = self.items[self.index]
-        self.index += 1
-        return item
+async def async_chunks(chunks):
+    """把字节块列表包装为异步迭代器，作为流式响应的 body"""
+    for chunk in chunks:
+        yield chunk
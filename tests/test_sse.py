@@ -0,0 +1,38 @@
+"""单元测试：测试 SSE 字节流切分"""
+
+from types import SimpleNamespace
+
+from src.utils.sse import iter_sse_data, iter_sse_frames_sync
+
+
+def fake_response(chunks):
+    """模拟 requests 流式响应（只实现 iter_content）"""
+    return SimpleNamespace(iter_content=lambda chunk_size: iter(chunks))
+
+
+class TestSSESplit:
+    """测试事件切分与 data 负载提取"""
+
+    def test_lf_frames(self):
+        """以 \\n\\n 分隔的事件可跨块拼接"""
+        frames = list(iter_sse_frames_sync([b"data: 1\n", b"\ndata: ", b"2\n\n"]))
+        assert frames == [b"data: 1", b"data: 2"]
+
+    def test_crlf_split_across_chunks(self):
+        """\\r\\n 被拆在两个块上时仍识别为一个换行"""
+        frames = list(
+            iter_sse_frames_sync([b"data: 1\r\n\r", b"\ndata: 2\r\r", b"data: 3"])
+        )
+        assert frames == [b"data: 1", b"data: 2", b"data: 3"]
+
+    def test_crlf_done_stops_iteration(self):
+        """CRLF 流中的 [DONE] 能被识别，其后的事件不再产出"""
+        response = fake_response(
+            [b"data: {}\r\n\r\n", b"data: [DONE]\r\n\r\n", b"data: late\r\n\r\n"]
+        )
+        assert list(iter_sse_data(response)) == [b"{}"]
+
+    def test_trailing_frame_without_blank_line(self):
+        """最后一个事件没有以空行结尾时也会产出"""
+        response = fake_response([b"data: {}\n\n", b"data: last\r\n"])
+        assert list(iter_sse_data(response)) == [b"{}", b"last"]
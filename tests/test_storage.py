@@ -0,0 +1,253 @@
+"""单元测试：测试 SQLite 执行器、API Key 存储及鉴权预取"""
+
+import sqlite3
+import time
+
+import pytest
+import pytest_asyncio
+
+from src.storage._sqlite_runner import SQLiteRunner
+from src.storage.apikey_storage import KEY_LIST_COLUMNS, APIKeyStorage
+from src.storage.auth_prefetch import AuthPrefetch
+from src.storage.session_storage import SessionStorage
+
+
+@pytest.fixture
+def runner(tmp_path):
+    """使用临时数据库的 SQLiteRunner"""
+    runner = SQLiteRunner(tmp_path / "runner.db")
+    yield runner
+    runner.close()
+
+
+@pytest.fixture
+def key_storage(tmp_path):
+    """使用临时数据库的 APIKeyStorage 实例"""
+    storage = APIKeyStorage()
+    storage._runner = SQLiteRunner(tmp_path / "api_keys.db")
+    yield storage
+    storage.close()
+
+
+@pytest.fixture
+def sess_storage(tmp_path):
+    """使用临时数据库的 SessionStorage 实例"""
+    storage = SessionStorage()
+    storage._runner = SQLiteRunner(tmp_path / "sessions.db")
+    yield storage
+    storage.close()
+
+
+@pytest_asyncio.fixture
+async def prefetch_env(tmp_path):
+    """临时会话库及挂载它的 AuthPrefetch"""
+    sessions = SessionStorage()
+    sessions._runner = SQLiteRunner(tmp_path / "sessions.db")
+    await sessions.init_db()
+
+    prefetch = AuthPrefetch()
+    prefetch._runner = SQLiteRunner(
+        tmp_path / "api_keys.db", attach={"s": tmp_path / "sessions.db"}
+    )
+    yield prefetch, sessions
+    prefetch.close()
+    sessions.close()
+
+
+class TestSQLiteRunner:
+    """测试 SQLiteRunner 的异常传递、回滚与关闭行为"""
+
+    @pytest.mark.asyncio
+    async def test_exception_reaches_caller(self, runner):
+        """fn 中抛出的异常应原样传回等待方，且不影响后续请求"""
+
+        def _fail(conn):
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError, match="boom"):
+            await runner.run(_fail)
+        assert (
+            await runner.run(lambda conn: conn.execute("SELECT 1").fetchone()[0]) == 1
+        )
+
+    @pytest.mark.asyncio
+    async def test_failed_transaction_rolled_back(self, runner):
+        """失败时未提交的事务应被回滚"""
+        await runner.run(lambda conn: conn.execute("CREATE TABLE t (v INTEGER)"))
+
+        def _insert_then_fail(conn):
+            conn.execute("INSERT INTO t (v) VALUES (1)")
+            raise sqlite3.OperationalError("fail after insert")
+
+        with pytest.raises(sqlite3.OperationalError):
+            await runner.run(_insert_then_fail)
+
+        in_transaction, count = await runner.run(
+            lambda conn: (
+                conn.in_transaction,
+                conn.execute("SELECT COUNT(*) FROM t").fetchone()[0],
+            )
+        )
+        assert in_transaction is False
+        assert count == 0
+
+    @pytest.mark.asyncio
+    async def test_run_after_close_raises(self, runner):
+        """关闭后再调用 run() 应立即抛出 RuntimeError，而不是永久等待"""
+        await runner.run(lambda conn: conn.execute("SELECT 1"))
+        runner.close()
+        with pytest.raises(RuntimeError):
+            await runner.run(lambda conn: conn.execute("SELECT 1"))
+
+    @pytest.mark.asyncio
+    async def test_wal_checkpoint_truncates_wal(self, runner):
+        """wal_checkpoint() 返回 (busy, log, checkpointed) 并截断 WAL 文件"""
+
+        def _write(conn):
+            conn.execute("CREATE TABLE t (v INTEGER)")
+            conn.executemany("INSERT INTO t (v) VALUES (?)", [(i,) for i in range(100)])
+            conn.commit()
+
+        await runner.run(_write)
+        result = await runner.wal_checkpoint()
+        assert len(result) == 3
+        assert result[0] == 0
+        wal_file = runner.db_path.with_name(runner.db_path.name + "-wal")
+        assert wal_file.stat().st_size == 0
+
+
+class TestAPIKeyCache:
+    """测试 get_api_key 的缓存行为"""
+
+    @pytest.mark.asyncio
+    async def test_get_api_key_hits_cache(self, key_storage):
+        """第二次查询应命中内存缓存"""
+        await key_storage.init_db()
+        assert await key_storage.add_api_key("sk-cache-test", user_id=1)
+
+        first = await key_storage.get_api_key("sk-cache-test")
+        assert first is not None
+        assert "sk-cache-test" in key_storage._cache
+
+        second = await key_storage.get_api_key("sk-cache-test")
+        assert second is first
+
+    @pytest.mark.asyncio
+    async def test_revoke_invalidates_cache(self, key_storage):
+        """吊销后缓存项应被清除"""
+        await key_storage.init_db()
+        await key_storage.add_api_key("sk-revoke-test", user_id=1)
+
+        key = await key_storage.get_api_key("sk-revoke-test")
+        assert await key_storage.revoke_api_key(key["id"], user_id=1)
+        assert "sk-revoke-test" not in key_storage._cache
+        assert await key_storage.get_api_key("sk-revoke-test") is None
+
+
+class TestAPIKeyBatch:
+    """测试批量写入与列式读取"""
+
+    @pytest.mark.asyncio
+    async def test_add_api_keys_inserts_all(self, key_storage):
+        """批量插入返回插入数量，所有 Key 均可查询"""
+        await key_storage.init_db()
+        items = [("sk-batch-1", 1, "default"), ("sk-batch-2", 1, "cursor")]
+        assert await key_storage.add_api_keys(items) == 2
+
+        second = await key_storage.get_api_key("sk-batch-2")
+        assert second["purpose"] == "cursor"
+        assert len(await key_storage.list_api_keys_by_user(1)) == 2
+
+    @pytest.mark.asyncio
+    async def test_add_api_keys_rolls_back_on_duplicate(self, key_storage):
+        """批内有重复 Key 时整批回滚并返回 0"""
+        await key_storage.init_db()
+        await key_storage.add_api_key("sk-existing", user_id=1)
+        items = [("sk-new", 1, "default"), ("sk-existing", 1, "default")]
+
+        assert await key_storage.add_api_keys(items) == 0
+        assert await key_storage.get_api_key("sk-new") is None
+        assert len(await key_storage.list_all_keys()) == 1
+
+    @pytest.mark.asyncio
+    async def test_add_api_keys_empty(self, key_storage):
+        """空列表直接返回 0"""
+        assert await key_storage.add_api_keys([]) == 0
+
+    @pytest.mark.asyncio
+    async def test_list_all_keys_columns_layout(self, key_storage):
+        """列式结果与 list_all_keys 的行一一对应"""
+        await key_storage.init_db()
+        await key_storage.add_api_keys(
+            [("sk-col-1", 1, "default"), ("sk-col-2", 2, "cursor")]
+        )
+
+        columns = await key_storage.list_all_keys_columns()
+        rows = await key_storage.list_all_keys()
+        assert tuple(columns) == KEY_LIST_COLUMNS
+        for name in KEY_LIST_COLUMNS:
+            assert columns[name] == [row[name] for row in rows]
+
+    @pytest.mark.asyncio
+    async def test_list_all_keys_columns_empty(self, key_storage):
+        """空表时每列都是空列表"""
+        await key_storage.init_db()
+        assert await key_storage.list_all_keys_columns() == {
+            name: [] for name in KEY_LIST_COLUMNS
+        }
+
+
+class TestNonceBatch:
+    """测试 nonce 的批量记录"""
+
+    @pytest.mark.asyncio
+    async def test_record_nonces_skips_duplicates(self, sess_storage):
+        """已存在及批内重复的 nonce 被忽略，只统计新记录的数量"""
+        await sess_storage.init_db()
+        assert await sess_storage.record_nonce("n-1")
+
+        assert await sess_storage.record_nonces(["n-1", "n-2", "n-2", "n-3"]) == 2
+        for nonce in ("n-1", "n-2", "n-3"):
+            assert not await sess_storage.is_nonce_valid(nonce)
+        count = await sess_storage._runner.run(
+            lambda conn: conn.execute("SELECT COUNT(*) FROM nonce_records").fetchone()[
+                0
+            ]
+        )
+        assert count == 3
+
+    @pytest.mark.asyncio
+    async def test_record_nonces_empty(self, sess_storage):
+        """空列表直接返回 0"""
+        assert await sess_storage.record_nonces([]) == 0
+
+
+class TestAuthPrefetch:
+    """测试 prefetch_signature 的跨库查询"""
+
+    @pytest.mark.asyncio
+    async def test_prefetch_signature_expired_session(self, prefetch_env):
+        """会话已过期时 session_secret 为 None"""
+        prefetch, sessions = prefetch_env
+        await sessions._runner.run(
+            lambda conn: (
+                conn.execute(
+                    """INSERT INTO user_sessions (user_id, session_secret, expires_at)
+                       VALUES (?, ?, ?)""",
+                    (1, "expired", int(time.time()) - 1),
+                ),
+                conn.commit(),
+            )
+        )
+
+        assert await prefetch.prefetch_signature(1, "n-1") == (False, None)
+
+    @pytest.mark.asyncio
+    async def test_prefetch_signature_reused_nonce(self, prefetch_env):
+        """已记录的 nonce 被标记为已使用，同时返回有效会话密钥"""
+        prefetch, sessions = prefetch_env
+        await sessions.create_session(1, "secret-1")
+
+        assert await prefetch.prefetch_signature(1, "n-1") == (False, "secret-1")
+        assert await sessions.record_nonce("n-1")
+        assert await prefetch.prefetch_signature(1, "n-1") == (True, "secret-1")
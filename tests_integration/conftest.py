@@ -0,0 +1,157 @@
+"""
+集成测试共享 fixture
+API 服务在当前进程的后台线程中启动一次，供所有 API 测试阶段共用
+"""
+
+import asyncio
+import atexit
+import contextlib
+import io
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import orjson
+import pytest
+import requests
+import uvicorn
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# 每个测试会话使用全新的临时数据库目录（优先放在 tmpfs 上），不读写 ./data，
+# 会话结束后删除；必须在导入 src.storage 之前设置。
+# CLI 子进程继承该环境变量，与进程内的服务、CLI 使用同一份数据库
+if "LLM_ROUTER_DB_DIR" not in os.environ:
+    _db_dir = tempfile.mkdtemp(
+        prefix="llm-router-test-",
+        dir="/dev/shm" if os.path.isdir("/dev/shm") else None,
+    )
+    os.environ["LLM_ROUTER_DB_DIR"] = _db_dir
+    atexit.register(shutil.rmtree, _db_dir, ignore_errors=True)
+
+HOST = "127.0.0.1"
+PORT = 8000
+# (连接超时, 读取超时)
+HTTP_TIMEOUT = (1.0, 10.0)
+# 测试用户的密码
+TEST_PASSWORD = "testpass123"
+# 测试用户名序号：以启动时间为起点递增，保证跨次运行不重复
+_user_ids = itertools.count(int(time.time()))
+
+
+def wait_ready(url, timeout=10.0, interval=0.05):
+    """轮询直到服务可响应（替代固定时长的 sleep），超时抛出 RuntimeError"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=0.25).status_code < 500:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(interval)
+    raise RuntimeError(f"服务在 {timeout} 秒内未就绪: {url}")
+
+
+class TimeoutSession(requests.Session):
+    """未显式指定 timeout 的请求使用默认超时"""
+
+    def request(self, method, url, *args, timeout=HTTP_TIMEOUT, **kwargs):
+        return super().request(method, url, *args, timeout=timeout, **kwargs)
+
+
+def run_cli(mod, argv):
+    """在当前进程内运行 CLI 的 main(argv) 并捕获输出（省去每次启动解释器的开销）"""
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf), contextlib.redirect_stderr(buf):
+        try:
+            asyncio.run(mod.main(argv))
+            returncode = 0
+        except SystemExit as e:
+            # argparse 参数错误等会以 SystemExit 退出
+            returncode = e.code or 0
+    return SimpleNamespace(returncode=returncode, stdout=buf.getvalue(), stderr="")
+
+
+@pytest.fixture(scope="session")
+def http():
+    """整个测试会话共用的 HTTP Session（keep-alive 复用 TCP 连接）"""
+    session = TimeoutSession()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=4, pool_maxsize=8, max_retries=0
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def api_server():
+    """启动 uvicorn 服务（整个测试会话只启动一次），返回内部 API 的基础 URL"""
+    config = uvicorn.Config("src.main:app", host=HOST, port=PORT, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    # 等待服务器启动（/ping 无任何业务逻辑，响应即代表已就绪）
+    wait_ready(f"http://{HOST}:{PORT}/api/v1/ping")
+
+    yield f"http://{HOST}:{PORT}/internal"
+
+    # 与 SIGINT 相同的优雅关闭路径；1 秒内未退出则强制退出（不再等待连接和后台任务）
+    server.should_exit = True
+    thread.join(timeout=1.0)
+    if thread.is_alive():
+        server.force_exit = True
+        thread.join(timeout=5)
+
+
+@pytest.fixture(scope="session")
+def test_user(api_server, http):
+    """注册一个随机测试用户（整个会话共用），返回用户名"""
+    username = f"testuser_{next(_user_ids)}"
+    response = http.post(
+        f"{api_server}/auth/register",
+        json={
+            "username": username,
+            "email": f"{username}@test.com",
+            "password": TEST_PASSWORD,
+        },
+    )
+    assert response.status_code in (200, 201), f"注册失败: {response.text}"
+    return username
+
+
+@pytest.fixture(scope="session")
+def user_token(api_server, http, test_user):
+    """测试用户登录后的 access_token"""
+    response = http.post(
+        f"{api_server}/auth/login",
+        json={"username": test_user, "password": TEST_PASSWORD},
+    )
+    assert response.status_code == 200, f"登录失败: {response.text}"
+    return orjson.loads(response.content)["access_token"]
+
+
+@pytest.fixture(scope="session")
+def auth_headers(user_token):
+    """测试用户的认证请求头"""
+    return {"Authorization": f"Bearer {user_token}"}
+
+
+@pytest.fixture(scope="session")
+def admin_token(api_server, http):
+    """管理员的 access_token；登录失败（如密码不同）时为 None，由测试决定是否跳过"""
+    response = http.post(
+        f"{api_server}/auth/login",
+        data={"username": "admin", "password": "admin"},  # 默认密码
+    )
+    if response.status_code != 200:
+        return None
+    return orjson.loads(response.content)["access_token"]
@@ -1,75 +1,80 @@
 """
 集成测试主程序
-运行所有测试阶段
+用 pytest 运行所有测试阶段：依赖本地服务的阶段按顺序执行，
+与只访问边缘 Worker 的阶段并发运行（--serial 时全部在当前进程内顺序执行）
 """
 
+import asyncio
 from pathlib import Path
-import subprocess
 import sys
 
+import pytest
+
+_HERE = Path(__file__).parent.resolve()
+
+# 共享同一个本地数据库/服务，后面的阶段依赖前面阶段创建的数据，必须按顺序执行
+LOCAL_PHASES = [
+    ("test_01_init.py", "数据库初始化测试"),
+    ("test_02_cli_users.py", "CLI 用户管理测试"),
+    ("test_03_cli_keys.py", "CLI API Key 管理测试"),
+    ("test_04_api.py", "API 端点与边界条件测试"),
+]
+# 只访问边缘 Worker，可与本地阶段并发执行
+WORKER_PHASES = [
+    ("test_06_edge_worker.py", "边缘 Worker 能力测试"),
+]
+TESTS = LOCAL_PHASES + WORKER_PHASES
+
+PYTEST_ARGS = [
+    "-v",
+    "--tb=short",
+    # 某个文件收集失败时继续运行其余文件
+    "--continue-on-collection-errors",
+    # test_01 是未标记的 async 测试函数
+    "--asyncio-mode=auto",
+]
+
+
+def phase_paths(phases):
+    """阶段列表 -> 测试文件路径"""
+    return [str(_HERE / test_file) for test_file, _ in phases]
+
+
+async def run_pytest(phases, extra_args):
+    """在子进程中运行一组阶段，输出直接写到当前终端"""
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "pytest",
+        *phase_paths(phases),
+        *PYTEST_ARGS,
+        *extra_args,
+        stdout=None,
+        stderr=None,
+    )
+    return await proc.wait()
 
-def run_test(test_file):
-    """运行单个测试文件"""
-    print(f"\n{'='*60}")
-    print(f"运行: {test_file}")
-    print('='*60)
 
-    test_path = Path(__file__).parent / test_file
-    result = subprocess.run(
-        [sys.executable, str(test_path)],
-        capture_output=False,  # 直接输出到控制台
-        text=True
+async def run_concurrently(extra_args):
+    """本地阶段与 Worker 阶段并发运行，返回第一个非零退出码"""
+    codes = await asyncio.gather(
+        run_pytest(LOCAL_PHASES, extra_args),
+        run_pytest(WORKER_PHASES, extra_args),
     )
-
-    return result.returncode == 0
+    return next((code for code in codes if code != 0), 0)
 
 
 def main():
-    """运行所有测试"""
+    """运行所有测试（额外的命令行参数会原样传给 pytest，如 -k / -x）"""
     print("\n" + "="*60)
     print("API Mirror 集成测试套件")
     print("="*60)
 
-    tests = [
-        ("test_01_init.py", "数据库初始化测试"),
-        ("test_02_cli_users.py", "CLI 用户管理测试"),
-        ("test_03_cli_keys.py", "CLI API Key 管理测试"),
-        ("test_04_api.py", "API 端点测试"),
-        ("test_05_edge_cases.py", "边界条件测试"),
-        ("test_06_edge_worker.py", "边缘 Worker 能力测试"),
-    ]
-
-    results = []
-
-    for test_file, description in tests:
-        success = run_test(test_file)
-        results.append((test_file, description, success))
-
-        if not success:
-            print(f"\n[FAIL] {description} 失败，是否继续? (y/n): ", end="")
-            # 自动继续
-            print("y")
-
-    # 打印总结
-    print("\n" + "="*60)
-    print("测试总结")
-    print("="*60)
-
-    for test_file, description, success in results:
-        status = "[PASS]" if success else "[FAIL]"
-        print(f"{status} - {description} ({test_file})")
-
-    passed = sum(1 for _, _, s in results if s)
-    total = len(results)
-
-    print(f"\n总计: {passed}/{total} 通过")
-
-    if passed == total:
-        print("\n[SUCCESS] 所有测试通过!")
-        return 0
-    else:
-        print(f"\n[WARN] {total - passed} 个测试失败")
-        return 1
+    extra_args = sys.argv[1:]
+    if "--serial" in extra_args:
+        extra_args.remove("--serial")
+        return int(pytest.main(phase_paths(TESTS) + PYTEST_ARGS + extra_args))
+    return asyncio.run(run_concurrently(extra_args))
 
 
 if __name__ == "__main__":
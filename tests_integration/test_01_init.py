@@ -6,8 +6,10 @@ Phase 1: 数据库初始化测试
 import asyncio
 from pathlib import Path
 import sys
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(_ROOT))
 
+from src.storage._paths import DB_DIR
 from src.storage.apikey_storage import APIKeyStorage
 from src.storage.user_storage import UserStorage
 
@@ -19,7 +21,7 @@ async def test_database_initialization():
     print("=" * 50)
 
     # 清理旧数据
-    data_dir = Path("./data")
+    data_dir = DB_DIR
     if data_dir.exists():
         for f in data_dir.glob("*.db*"):
             f.unlink()
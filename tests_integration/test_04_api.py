@@ -1,195 +1,129 @@
 """
-Phase 4-7: API 端点测试
-测试所有内部 API 端点功能
+Phase 4: API 端点与边界条件测试
+测试内部 API 端点功能及各种边界条件、保护机制
+（共用 conftest 中的 api_server / http / 用户 Token 等 fixture，服务只启动一次）
 """
 
 from pathlib import Path
 import subprocess
 import sys
-import time
 
-import requests
+import orjson
+import pytest
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-BASE_URL = "http://localhost:8000/internal"
-ADMIN_TOKEN = None
-USER_TOKEN = None
 
-
-def run_command(cmd, wait=True):
-    """运行命令"""
-    result = subprocess.run(
-        cmd,
-        shell=True,
+def run_command(argv):
+    """运行命令（argv 列表，不经过 shell）"""
+    return subprocess.run(
+        argv,
         capture_output=True,
         text=True,
         cwd=Path(__file__).parent.parent
     )
-    return result
-
-
-def test_api_endpoints():
-    """测试 API 端点"""
-    print("=" * 50)
-    print("Phase 4-7: API 端点测试")
-    print("=" * 50)
-
-    global ADMIN_TOKEN, USER_TOKEN
-
-    # 启动服务器
-    print("\n1. 启动测试服务器...")
-    print("   请稍等 3 秒...")
-    server_process = subprocess.Popen(
-        ["python", "-m", "uvicorn", "src.main:app",
-            "--host", "localhost", "--port", "8000"],
-        cwd=Path(__file__).parent.parent,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
+
+
+# ========== API 端点 ==========
+
+def test_register(test_user):
+    """用户注册（由 test_user fixture 完成）"""
+    assert test_user
+
+
+def test_login(user_token):
+    """用户登录，获取 Token（由 user_token fixture 完成）"""
+    assert user_token
+
+
+def test_me(api_server, http, test_user, auth_headers):
+    """获取当前用户信息"""
+    response = http.get(f"{api_server}/users/me", headers=auth_headers)
+    assert response.status_code == 200, f"获取用户信息失败: {response.text}"
+    data = orjson.loads(response.content)
+    assert data["username"] == test_user, "用户名不匹配"
+
+
+def test_keys(api_server, http, auth_headers):
+    """创建并列出 API Key"""
+    response = http.post(
+        f"{api_server}/users/me/keys",
+        headers=auth_headers,
+        json={"purpose": "API Test Key"}
     )
+    assert response.status_code in [200, 201], f"创建 API Key 失败: {response.text}"
+    key_id = orjson.loads(response.content).get("id")
+
+    response = http.get(f"{api_server}/users/me/keys", headers=auth_headers)
+    assert response.status_code == 200, f"列出 API Keys 失败: {response.text}"
+    key_ids = {key["id"] for key in orjson.loads(response.content)}
+    assert key_id in key_ids, "列表中未找到刚创建的 API Key"
+
+
+def test_admin(api_server, http, admin_token, auth_headers):
+    """管理员接口可访问，普通用户被拒绝"""
+    if not admin_token:
+        pytest.skip("管理员登录失败（可能密码不同），跳过管理员测试")
+
+    response = http.get(
+        f"{api_server}/admin/users",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200, f"管理员接口访问失败: {response.text}"
+
+    response = http.get(f"{api_server}/admin/users", headers=auth_headers)
+    assert response.status_code == 403, "普通用户应该被拒绝访问管理员接口"
+
+
+# ========== 边界条件 ==========
+
+def test_duplicate_register(api_server, http, test_user):
+    """注册重复用户"""
+    response = http.post(
+        f"{api_server}/auth/register",
+        json={
+            "username": test_user,
+            "email": f"{test_user}@test.com",
+            "password": "testpass123"
+        }
+    )
+    # 应该失败或返回已存在提示
+    assert response.status_code in [201, 400, 409], "重复注册应该有明确的错误码"
+
+
+def test_wrong_password(api_server, http, test_user):
+    """登录错误密码"""
+    response = http.post(
+        f"{api_server}/auth/login",
+        json={
+            "username": test_user,
+            "password": "wrongpassword"
+        }
+    )
+    # 422 表示格式错误，401 表示认证失败，两者都可接受
+    assert response.status_code in [401, 422], "错误密码应该返回 401 或 422"
+
+
+def test_bad_token(api_server, http):
+    """使用无效 Token 访问"""
+    response = http.get(
+        f"{api_server}/users/me",
+        headers={"Authorization": "Bearer invalid_token"}
+    )
+    assert response.status_code == 401, "无效 Token 应该返回 401"
+
+
+def test_missing_auth(api_server, http):
+    """缺少认证头"""
+    response = http.get(f"{api_server}/users/me")
+    assert response.status_code == 401, "缺少认证应该返回 401"
+
 
-    # 等待服务器启动
-    time.sleep(3)
-
-    try:
-        # 测试 1: 用户注册
-        print("\n2. 测试用户注册...")
-        import uuid
-        unique_id = str(uuid.uuid4())[:8]
-        test_username = f"testuser_{unique_id}"
-        test_email = f"testuser_{unique_id}@test.com"
-        response = requests.post(
-            f"{BASE_URL}/auth/register",
-            json={
-                "username": test_username,
-                "email": test_email,
-                "password": "testpass123"
-            }
-        )
-        print(f"   状态码: {response.status_code}")
-        print(f"   响应: {response.json() if response.text else 'No content'}")
-        assert response.status_code in [200, 201], f"注册失败: {response.text}"
-        print("   [PASS] 用户注册成功")
-
-        # 测试 2: 用户登录
-        print("\n3. 测试用户登录...")
-        response = requests.post(
-            f"{BASE_URL}/auth/login",
-            json={  # JSON 格式
-                "username": test_username,
-                "password": "testpass123"
-            }
-        )
-        print(f"   状态码: {response.status_code}")
-        data = response.json()
-        print(f"   响应: {data}")
-        assert response.status_code == 200, f"登录失败: {response.text}"
-        assert "access_token" in data, "响应中没有 access_token"
-        USER_TOKEN = data["access_token"]
-        print("   [PASS] 用户登录成功，获取到 Token")
-
-        # 测试 3: 获取当前用户信息
-        print("\n4. 测试获取当前用户信息...")
-        response = requests.get(
-            f"{BASE_URL}/users/me",
-            headers={"Authorization": f"Bearer {USER_TOKEN}"}
-        )
-        print(f"   状态码: {response.status_code}")
-        data = response.json()
-        print(f"   响应: {data}")
-        assert response.status_code == 200, f"获取用户信息失败: {response.text}"
-        assert data["username"] == test_username, "用户名不匹配"
-        print("   [PASS] 获取用户信息成功")
-
-        # 测试 4: 创建 API Key
-        print("\n5. 测试创建 API Key...")
-        response = requests.post(
-            f"{BASE_URL}/users/me/keys",
-            headers={"Authorization": f"Bearer {USER_TOKEN}"},
-            json={"purpose": "API Test Key"}
-        )
-        print(f"   状态码: {response.status_code}")
-        data = response.json()
-        print(f"   响应: {data}")
-        assert response.status_code in [
-            200, 201], f"创建 API Key 失败: {response.text}"
-        key_id = data.get("id")
-        print(f"   [PASS] API Key 创建成功，ID: {key_id}")
-
-        # 测试 5: 列出 API Keys
-        print("\n6. 测试列出 API Keys...")
-        response = requests.get(
-            f"{BASE_URL}/users/me/keys",
-            headers={"Authorization": f"Bearer {USER_TOKEN}"}
-        )
-        print(f"   状态码: {response.status_code}")
-        data = response.json()
-        print(f"   响应: {data}")
-        assert response.status_code == 200, f"列出 API Keys 失败: {response.text}"
-        print(f"   [PASS] 找到 {len(data)} 个 API Key")
-
-        # 测试 6: 管理员登录
-        print("\n7. 测试管理员登录...")
-        response = requests.post(
-            f"{BASE_URL}/auth/login",
-            data={
-                "username": "admin",
-                "password": "admin"  # 默认密码
-            }
-        )
-        print(f"   状态码: {response.status_code}")
-        if response.status_code == 200:
-            data = response.json()
-            ADMIN_TOKEN = data["access_token"]
-            print("   [PASS] 管理员登录成功")
-        else:
-            print("   [WARN] 管理员登录失败（可能密码不同），跳过管理员测试")
-
-        # 测试 7: 管理员接口（如果登录成功）
-        if ADMIN_TOKEN:
-            print("\n8. 测试管理员接口...")
-            response = requests.get(
-                f"{BASE_URL}/admin/users",
-                headers={"Authorization": f"Bearer {ADMIN_TOKEN}"}
-            )
-            print(f"   状态码: {response.status_code}")
-            data = response.json()
-            print(f"   响应: {data}")
-            assert response.status_code == 200, f"管理员接口访问失败: {response.text}"
-            print("   [PASS] 管理员接口访问成功")
-
-            # 测试 9: 普通用户访问管理员接口（应该失败）
-            print("\n9. 测试权限控制（普通用户访问管理员接口）...")
-            response = requests.get(
-                f"{BASE_URL}/admin/users",
-                headers={"Authorization": f"Bearer {USER_TOKEN}"}
-            )
-            print(f"   状态码: {response.status_code}")
-            assert response.status_code == 403, "普通用户应该被拒绝访问管理员接口"
-            print("   [PASS] 权限控制正确，普通用户被拒绝")
-
-        print("\n[SUCCESS] Phase 4-7 测试通过\n")
-
-    finally:
-        # 关闭服务器
-        print("关闭测试服务器...")
-        server_process.terminate()
-        try:
-            server_process.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            server_process.kill()
-
-    return True
+def test_cli_list_users():
+    """CLI 列用户（基本功能检查）"""
+    result = run_command([sys.executable, "-m", "src.manage_users", "list-users"])
+    assert result.returncode == 0, "列用户命令应该成功"
 
 
 if __name__ == "__main__":
-    try:
-        test_api_endpoints()
-    except AssertionError as e:
-        print(f"\n[FAIL] 测试失败: {e}")
-        sys.exit(1)
-    except Exception as e:
-        print(f"\n[FAIL] 测试出错: {e}")
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
+    sys.exit(pytest.main([__file__, "-v", "-s"]))
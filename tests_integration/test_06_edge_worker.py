@@ -3,22 +3,55 @@ Phase 6: 边缘 Worker 能力测试
 测试边缘 Worker 的各项 API 功能
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import orjson
 import requests
 import sys
-import json
+import threading
 import time
 import os
 from pathlib import Path
 import dotenv
 dotenv.load_dotenv()
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.sse import iter_sse_data
+
 
 # Worker 基础配置
 WORKER_URL = "http://localhost:8787"
 API_BASE = f"{WORKER_URL}/api/v1"
 
-# 测试用的 API Key（需要用户提前配置）
-TEST_API_KEY = None
+# (连接超时, 读取超时)；对话接口需要等待上游模型生成，读取超时放宽
+HTTP_TIMEOUT = (1.0, 10.0)
+CHAT_TIMEOUT = (1.0, 60.0)
+
+# requests.Session 不是线程安全的：每个线程各用一个 Session（keep-alive 复用 TCP 连接）
+_local = threading.local()
+
+
+def get_session():
+    """返回当前线程的 Session，首次调用时创建"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=4, pool_maxsize=8, max_retries=0
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+    return session
+
+
+# 主线程中顺序执行的测试共用的 Session
+http = get_session()
+
+# 测试用的 API Key（需要用户提前配置，从环境变量或 .env 文件加载）
+TEST_API_KEY = os.getenv("TEST_API_KEY")
+# 请求头在模块加载时构建一次，各请求复用
+AUTH_HEADERS = {"Authorization": f"Bearer {TEST_API_KEY}"}
+JSON_HEADERS = {**AUTH_HEADERS, "Content-Type": "application/json"}
 
 # 允许的模型（白名单）
 ALLOWED_MODELS = {
@@ -26,15 +59,15 @@ ALLOWED_MODELS = {
     "kimi": ["moonshot-v1-8k"],
     "test": ["test"],
 }
-
-
-def load_api_key():
-    """加载测试用的 API Key"""
-    global TEST_API_KEY
-
-    # 尝试从环境变量或 .env 文件加载
-    TEST_API_KEY = os.getenv("TEST_API_KEY")
-    return TEST_API_KEY
+# 白名单展开为 "provider/model" 集合，校验时做集合差即可
+ALLOWED_PAIRS = frozenset(
+    f"{provider}/{model}" for provider, models in ALLOWED_MODELS.items() for model in models
+)
+# 模型列表中必须出现的模型
+REQUIRED_MODELS = frozenset({
+    f"deepseek/{ALLOWED_MODELS['deepseek'][0]}",
+    f"kimi/{ALLOWED_MODELS['kimi'][0]}",
+})
 
 
 def test_health_check():
@@ -42,18 +75,20 @@ def test_health_check():
     print("\n1. 测试健康检查...")
 
     # GET /ping
-    response = requests.get(
+    response = http.get(
         f"{API_BASE}/ping",
-        headers={"Authorization": f"Bearer {TEST_API_KEY}"}
+        headers=AUTH_HEADERS,
+        timeout=HTTP_TIMEOUT
     )
     assert response.status_code == 200, f"GET /ping 失败: {response.status_code}"
     assert response.text == "OK", f"GET /ping 响应不正确: {response.text}"
     print("   [PASS] GET /api/v1/ping")
 
     # POST /ping
-    response = requests.post(
+    response = http.post(
         f"{API_BASE}/ping",
-        headers={"Authorization": f"Bearer {TEST_API_KEY}"}
+        headers=AUTH_HEADERS,
+        timeout=HTTP_TIMEOUT
     )
     assert response.status_code == 200, f"POST /ping 失败: {response.status_code}"
     assert response.text == "OK", f"POST /ping 响应不正确: {response.text}"
@@ -65,22 +100,24 @@ def test_authentication():
     print("\n2. 测试认证机制...")
 
     # 无认证
-    response = requests.get(f"{API_BASE}/models")
+    response = http.get(f"{API_BASE}/models", timeout=HTTP_TIMEOUT)
     assert response.status_code == 401, f"无认证应返回 401，实际: {response.status_code}"
     print("   [PASS] 无认证返回 401")
 
     # 无效 API Key
-    response = requests.get(
+    response = http.get(
         f"{API_BASE}/models",
-        headers={"Authorization": "Bearer invalid-key"}
+        headers={"Authorization": "Bearer invalid-key"},
+        timeout=HTTP_TIMEOUT
     )
     assert response.status_code == 401, f"无效 Key 应返回 401，实际: {response.status_code}"
     print("   [PASS] 无效 API Key 返回 401")
 
     # 错误的 Authorization 格式
-    response = requests.get(
+    response = http.get(
         f"{API_BASE}/models",
-        headers={"Authorization": "Basic dGVzdDp0ZXN0"}
+        headers={"Authorization": "Basic dGVzdDp0ZXN0"},
+        timeout=HTTP_TIMEOUT
     )
     assert response.status_code == 401, f"错误格式应返回 401，实际: {response.status_code}"
     print("   [PASS] 错误 Authorization 格式返回 401")
@@ -90,13 +127,14 @@ def test_models_list():
     """测试模型列表（验证白名单限制）"""
     print("\n3. 测试模型列表...")
 
-    response = requests.get(
+    response = http.get(
         f"{API_BASE}/models",
-        headers={"Authorization": f"Bearer {TEST_API_KEY}"}
+        headers=AUTH_HEADERS,
+        timeout=HTTP_TIMEOUT
     )
     assert response.status_code == 200, f"获取模型列表失败: {response.status_code}"
 
-    data = response.json()
+    data = orjson.loads(response.content)
     assert data.get("object") == "list", "响应格式不正确"
     assert "data" in data, "响应缺少 data 字段"
 
@@ -105,18 +143,13 @@ def test_models_list():
     print(f"   可用模型: {model_ids}")
 
     # 验证白名单
-    for model_id in model_ids:
-        provider, model_name = model_id.split("/", 1)
-        assert provider in ALLOWED_MODELS, f"Provider '{provider}' 不在白名单中"
-        assert model_name in ALLOWED_MODELS[provider], f"模型 '{model_name}' 不在白名单中"
+    model_id_set = set(model_ids)
+    not_allowed = model_id_set - ALLOWED_PAIRS
+    assert not not_allowed, f"模型不在白名单中: {sorted(not_allowed)}"
 
     # 验证必须包含指定的模型
-    expected_models = [
-        f"deepseek/{ALLOWED_MODELS['deepseek'][0]}",
-        f"kimi/{ALLOWED_MODELS['kimi'][0]}"
-    ]
-    for expected in expected_models:
-        assert expected in model_ids, f"缺少必需的模型: {expected}"
+    missing = REQUIRED_MODELS - model_id_set
+    assert not missing, f"缺少必需的模型: {sorted(missing)}"
 
     print("   [PASS] 模型列表符合白名单限制")
     return model_ids
@@ -126,22 +159,21 @@ def test_chat_completion_non_stream(provider: str, model: str):
     """测试非流式对话完成"""
     print(f"\n4. 测试 {provider}/{model} 非流式对话...")
 
-    response = requests.post(
+    # 在线程池中并发执行，使用本线程的 Session
+    response = get_session().post(
         f"{API_BASE}/chat/completions",
-        headers={
-            "Authorization": f"Bearer {TEST_API_KEY}",
-            "Content-Type": "application/json"
-        },
+        headers=JSON_HEADERS,
         json={
             "model": f"{provider}/{model}",
             "messages": [{"role": "user", "content": "Hello, who are you?"}],
             "stream": False
-        }
+        },
+        timeout=CHAT_TIMEOUT
     )
 
     assert response.status_code == 200, f"请求失败: {response.status_code} - {response.text}"
 
-    data = response.json()
+    data = orjson.loads(response.content)
     assert "choices" in data, "响应缺少 choices"
     assert len(data["choices"]) > 0, "choices 为空"
     assert data["choices"][0]["message"]["content"], "响应内容为空"
@@ -159,44 +191,46 @@ def test_chat_completion_stream(provider: str, model: str):
     """测试流式对话完成"""
     print(f"\n5. 测试 {provider}/{model} 流式对话...")
 
-    response = requests.post(
+    # 在线程池中并发执行，使用本线程的 Session；with 保证提前退出时也会关闭流式连接
+    with get_session().post(
         f"{API_BASE}/chat/completions",
-        headers={
-            "Authorization": f"Bearer {TEST_API_KEY}",
-            "Content-Type": "application/json"
-        },
+        headers=JSON_HEADERS,
         json={
             "model": f"{provider}/{model}",
             "messages": [{"role": "user", "content": "Say hello briefly"}],
             "stream": True
         },
-        stream=True
-    )
-
-    assert response.status_code == 200, f"请求失败: {response.status_code} - {response.text}"
-    assert "text/event-stream" in response.headers.get(
-        "Content-Type", ""), "Content-Type 不正确"
-
-    # 读取流式响应
-    chunks = []
-    for line in response.iter_lines():
-        if line:
-            line_str = line.decode("utf-8")
-            if line_str.startswith("data: "):
-                data = line_str[6:]
-                if data == "[DONE]":
-                    break
-                try:
-                    chunk = json.loads(data)
-                    if chunk.get("choices") and chunk["choices"][0].get("delta", {}).get("content"):
-                        chunks.append(chunk["choices"][0]["delta"]["content"])
-                except json.JSONDecodeError:
-                    pass
-
-    full_content = "".join(chunks)
-    assert len(full_content) > 0, "流式响应内容为空"
-    print(f"   响应: {full_content[:50]}...")
-    print(f"   接收 {len(chunks)} 个 chunk")
+        stream=True,
+        timeout=CHAT_TIMEOUT
+    ) as response:
+        assert response.status_code == 200, f"请求失败: {response.status_code} - {response.text}"
+        assert "text/event-stream" in response.headers.get(
+            "Content-Type", ""), "Content-Type 不正确"
+
+        # 读取流式响应（只累计计数和开头的一小段内容，不保留完整文本）
+        total_chars, n_chunks, prefix = 0, 0, []
+        prefix_budget = 50
+        for payload in iter_sse_data(response):
+            try:
+                chunk = orjson.loads(payload)
+            except ValueError:
+                continue
+            try:
+                content = chunk["choices"][0]["delta"]["content"]
+            except (KeyError, IndexError, TypeError):
+                continue
+            if not content:
+                continue
+            n_chunks += 1
+            total_chars += len(content)
+            if prefix_budget > 0:
+                take = content[:prefix_budget]
+                prefix.append(take)
+                prefix_budget -= len(take)
+
+    assert total_chars > 0, "流式响应内容为空"
+    print(f"   响应: {''.join(prefix)}...")
+    print(f"   接收 {n_chunks} 个 chunk，共 {total_chars} 字符")
     print(f"   [PASS] {provider}/{model} 流式对话")
 
 
@@ -205,59 +239,56 @@ def test_error_handling():
     print("\n6. 测试错误处理...")
 
     # 无效模型格式（无斜杠）
-    response = requests.post(
+    response = http.post(
         f"{API_BASE}/chat/completions",
-        headers={
-            "Authorization": f"Bearer {TEST_API_KEY}",
-            "Content-Type": "application/json"
-        },
+        headers=JSON_HEADERS,
         json={
             "model": "invalid-model",
             "messages": [{"role": "user", "content": "Hello"}]
-        }
+        },
+        timeout=HTTP_TIMEOUT
     )
     assert response.status_code == 404, f"无效模型格式应返回 404，实际: {response.status_code}"
     print("   [PASS] 无效模型格式返回 404")
 
     # 不存在的 Provider
-    response = requests.post(
+    response = http.post(
         f"{API_BASE}/chat/completions",
-        headers={
-            "Authorization": f"Bearer {TEST_API_KEY}",
-            "Content-Type": "application/json"
-        },
+        headers=JSON_HEADERS,
         json={
             "model": "nonexistent/model",
             "messages": [{"role": "user", "content": "Hello"}]
-        }
+        },
+        timeout=HTTP_TIMEOUT
     )
     assert response.status_code == 404, f"不存在 Provider 应返回 404，实际: {response.status_code}"
     print("   [PASS] 不存在 Provider 返回 404")
 
     # 无效 JSON
-    response = requests.post(
+    response = http.post(
         f"{API_BASE}/chat/completions",
-        headers={
-            "Authorization": f"Bearer {TEST_API_KEY}",
-            "Content-Type": "application/json"
-        },
-        data="invalid json"
+        headers=JSON_HEADERS,
+        data="invalid json",
+        timeout=HTTP_TIMEOUT
     )
     assert response.status_code == 400, f"无效 JSON 应返回 400，实际: {response.status_code}"
     print("   [PASS] 无效 JSON 返回 400")
 
 
-def test_worker_availability():
-    """测试 Worker 是否可用"""
+def test_worker_availability(total=1.0, interval=0.1):
+    """测试 Worker 是否可用（短超时快速重试，Worker 未启动时约 1 秒即可判定）"""
     print("\n0. 检查 Worker 可用性...")
-    try:
-        response = requests.get(f"{WORKER_URL}/api/v1/ping", timeout=5)
-        print(f"   Worker 运行在 {WORKER_URL}")
-        return True
-    except requests.ConnectionError:
-        print(f"   [ERROR] 无法连接到 Worker: {WORKER_URL}")
-        print("   请确保 Worker 已启动: cd worker && npm run dev")
-        return False
+    deadline = time.monotonic() + total
+    while time.monotonic() < deadline:
+        try:
+            http.get(f"{WORKER_URL}/api/v1/ping", timeout=0.2)
+            print(f"   Worker 运行在 {WORKER_URL}")
+            return True
+        except (requests.ConnectionError, requests.Timeout):
+            time.sleep(interval)
+    print(f"   [ERROR] 无法连接到 Worker: {WORKER_URL}")
+    print("   请确保 Worker 已启动: cd worker && npm run dev")
+    return False
 
 
 def main():
@@ -266,8 +297,6 @@ def main():
     print("Phase 6: 边缘 Worker 能力测试")
     print("=" * 60)
 
-    # 加载配置
-    load_api_key()
     print(f"   使用 API Key: {TEST_API_KEY[:10]}...")
 
     # 检查 Worker 可用性
@@ -281,15 +310,20 @@ def main():
         test_authentication()
         model_ids = test_models_list()
 
-        # 测试 Kimi
+        # 测试 Kimi / DeepSeek 的流式与非流式对话
+        # 四个请求互不依赖，耗时都在等待上游模型，并发执行（每个线程使用自己的 Session）
         kimi_model = ALLOWED_MODELS["kimi"][0]
-        test_chat_completion_non_stream("kimi", kimi_model)
-        test_chat_completion_stream("kimi", kimi_model)
-
-        # 测试 DeepSeek
         deepseek_model = ALLOWED_MODELS["deepseek"][0]
-        test_chat_completion_non_stream("deepseek", deepseek_model)
-        test_chat_completion_stream("deepseek", deepseek_model)
+        jobs = [
+            (test_chat_completion_non_stream, "kimi", kimi_model),
+            (test_chat_completion_stream, "kimi", kimi_model),
+            (test_chat_completion_non_stream, "deepseek", deepseek_model),
+            (test_chat_completion_stream, "deepseek", deepseek_model),
+        ]
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            futures = [executor.submit(fn, provider, model) for fn, provider, model in jobs]
+            for future in as_completed(futures):
+                future.result()
 
         test_error_handling()
 
@@ -10,10 +10,32 @@
 """
 
 import argparse
-import json
+import sys
+from pathlib import Path
 
+import orjson
 import requests
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.sse import iter_sse_data
+
+
+def jloads(content: bytes | str):
+    """解析 JSON 响应体"""
+    return orjson.loads(content)
+
+
+def jdumps(obj) -> str:
+    """格式化输出 JSON（缩进 2 格，保留非 ASCII 字符）"""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+
+def brief(data, max_len: int = 500) -> str:
+    """单行输出 JSON，超过 max_len 个字符的部分截断（只标注省略的字符数）"""
+    s = orjson.dumps(data).decode()
+    return s if len(s) <= max_len else s[:max_len] + f"...<+{len(s) - max_len} 字符>"
+
 
 def test_chat_completions(
     api_key: str,
@@ -54,30 +76,23 @@ def test_chat_completions(
         if stream:
             # 流式响应处理
             print("流式响应内容:\n")
-            full_content = ""
-            for line in response.iter_lines():
-                if line:
-                    line_text = line.decode("utf-8")
-                    if line_text.startswith("data: "):
-                        data = line_text[6:]
-                        if data == "[DONE]":
-                            break
-                        try:
-                            chunk = json.loads(data)
-                            delta = chunk.get("choices", [{}])[0].get("delta", {})
-                            content = delta.get("content", "")
-                            if content:
-                                print(content, end="", flush=True)
-                                full_content += content
-                        except json.JSONDecodeError:
-                            continue
+            # 内容已逐段打印，这里只累计字符数，不拼接完整文本
+            total_chars = 0
+            for data in iter_sse_data(response):
+                try:
+                    chunk = jloads(data)
+                    content = chunk["choices"][0]["delta"]["content"]
+                except (ValueError, KeyError, IndexError, TypeError):
+                    continue
+                if content:
+                    print(content, end="", flush=True)
+                    total_chars += len(content)
             print("\n\n" + "=" * 60)
-            print(f"完整响应 ({len(full_content)} 字符)")
+            print(f"完整响应 ({total_chars} 字符)")
         else:
             # 非流式响应处理
-            data = response.json()
-            print("响应结果:")
-            print(json.dumps(data, indent=2, ensure_ascii=False))
+            data = jloads(response.content)
+            print("响应结果:", brief(data))
 
             if "choices" in data and len(data["choices"]) > 0:
                 content = data["choices"][0].get("message", {}).get("content", "")
@@ -97,8 +112,8 @@ def test_chat_completions(
     except requests.exceptions.HTTPError as e:
         print(f"\n❌ HTTP 错误: {e}")
         try:
-            error_data = e.response.json()
-            print(f"错误详情: {json.dumps(error_data, indent=2, ensure_ascii=False)}")
+            error_data = jloads(e.response.content)
+            print(f"错误详情: {jdumps(error_data)}")
         except Exception:
             print(f"响应内容: {e.response.text}")
     except requests.exceptions.ConnectionError:
@@ -121,7 +136,7 @@ def test_models_list(api_key: str, base_url: str = "http://localhost:8787") -> N
     try:
         response = requests.get(url, headers=headers, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = jloads(response.content)
 
         print("可用模型:")
         for model in data.get("data", []):